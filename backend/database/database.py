@@ -1,49 +1,470 @@
-from typing import Dict, List, Optional
+# Database module
+from collections.abc import ItemsView, Mapping as MappingABC, ValuesView
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import chain, count
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Mapping, Tuple
+from types import MappingProxyType
+import heapq
 import json
+import os
 from models.models import Statement, StatementList, Transaction
+from database.sqlite_store import SQLiteStore
+from database.search_index import SearchIndex
 import threading
 
+class TransactionsView(MappingABC):
+    """
+    Read-only mapping of transaction ID -> transaction across all statements
+
+    Lookups go through the per-statement maps, so there is no global
+    transaction index that every write would have to copy.
+    """
+
+    __slots__ = ("_statement_transactions",)
+
+    def __init__(self, statement_transactions: Mapping[str, Mapping[str, Transaction]]):
+        self._statement_transactions = statement_transactions
+
+    def __getitem__(self, transaction_id: str) -> Transaction:
+        for transactions in self._statement_transactions.values():
+            transaction = transactions.get(transaction_id)
+            if transaction is not None:
+                return transaction
+        raise KeyError(transaction_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return chain.from_iterable(self._statement_transactions.values())
+
+    def __len__(self) -> int:
+        return sum(len(transactions) for transactions in self._statement_transactions.values())
+
+    def items(self) -> ItemsView:
+        return _TransactionItems(self)
+
+    def values(self) -> ValuesView:
+        return _TransactionValues(self)
+
+class _TransactionItems(ItemsView):
+    """Items of a TransactionsView without a lookup per key"""
+
+    def __iter__(self):
+        return chain.from_iterable(
+            transactions.items() for transactions in self._mapping._statement_transactions.values()
+        )
+
+class _TransactionValues(ValuesView):
+    """Values of a TransactionsView without a lookup per key"""
+
+    def __iter__(self):
+        return chain.from_iterable(
+            transactions.values() for transactions in self._mapping._statement_transactions.values()
+        )
+
+class StatementSummary(NamedTuple):
+    """Ranges and categories of a statement's transactions, for filtering searches by statement"""
+
+    first_post_date: datetime
+    last_post_date: datetime
+    min_amount: float
+    max_amount: float
+    # Category -> IDs of the statement's transactions in it
+    categories: Mapping[str, FrozenSet[str]]
+
+    @classmethod
+    def of(cls, statement: Statement) -> Optional["StatementSummary"]:
+        """Summarize a statement, None if it has no transactions"""
+        transactions = statement.transactions
+        if not transactions:
+            return None
+        post_dates = [transaction.post_date for transaction in transactions]
+        amounts = [transaction.amount for transaction in transactions]
+        categories: Dict[str, List[str]] = {}
+        for transaction in transactions:
+            categories.setdefault(transaction.category, []).append(transaction.id)
+        return cls(
+            min(post_dates),
+            max(post_dates),
+            min(amounts),
+            max(amounts),
+            MappingProxyType({category: frozenset(ids) for category, ids in categories.items()})
+        )
+
+class DatabaseSnapshot:
+    """
+    Immutable view of the database at a single version.
+
+    Readers hold on to a snapshot for as long as they need a consistent
+    picture; writers never modify a published snapshot, they build a new
+    one and swap it in. Transactions are kept per statement so a write only
+    copies the top-level maps and the statements it touches.
+    """
+
+    __slots__ = (
+        "version", "statements", "statement_transactions", "statement_summaries", "transactions", "search_index"
+    )
+
+    def __init__(
+        self,
+        version: int,
+        statements: Mapping[str, Statement],
+        statement_transactions: Mapping[str, Mapping[str, Transaction]],
+        statement_summaries: Mapping[str, StatementSummary],
+        search_index: SearchIndex
+    ):
+        self.version = version
+        self.statements: Mapping[str, Statement] = MappingProxyType(statements)
+        # Statement ID -> transaction ID -> transaction
+        self.statement_transactions: Mapping[str, Mapping[str, Transaction]] = MappingProxyType(
+            statement_transactions
+        )
+        # Statement ID -> summary, for statements with transactions
+        self.statement_summaries: Mapping[str, StatementSummary] = MappingProxyType(statement_summaries)
+        self.transactions: Mapping[str, Transaction] = TransactionsView(self.statement_transactions)
+        # Inverted index over transaction descriptions
+        self.search_index = search_index
+
+    def find_transaction(self, transaction_id: str) -> Optional[Tuple[str, Transaction]]:
+        """Get (statement ID, transaction) for a transaction ID, or None"""
+        for statement_id, transactions in self.statement_transactions.items():
+            transaction = transactions.get(transaction_id)
+            if transaction is not None:
+                return statement_id, transaction
+        return None
+
 class Database:
-    """In-memory database for statements and transactions"""
-    
-    def __init__(self):
-        self.statements: Dict[str, Statement] = {}
-        self.transactions: Dict[str, Transaction] = {}
+    """
+    In-memory database for statements and transactions
+
+    Uses copy-on-write snapshots: writes are serialized by a lock and publish
+    a new snapshot with a single reference swap, reads never take the lock
+    and always see one complete version of the statement set.
+
+    With a store, every write is also persisted to it and reads pick up
+    writes made by other worker processes sharing the same store. Readers
+    catch up without the write lock and only publish their catch-up if no
+    newer snapshot was swapped in meanwhile.
+    """
+
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        # Serializes writers; readers never take it
         self._lock = threading.Lock()
-    
+        # Held only to swap in a new snapshot
+        self._publish_lock = threading.Lock()
+        self._store = store
+        self._snapshot = DatabaseSnapshot(0, {}, {}, {}, SearchIndex())
+        # Snapshot waiting for the current write to commit
+        self._pending = None
+
+        if self._store:
+            self._catch_up(self._snapshot)
+
+    @property
+    def store(self) -> Optional[SQLiteStore]:
+        """Store shared with other worker processes, if any"""
+        return self._store
+
+    @property
+    def statements(self) -> Mapping[str, Statement]:
+        """Read-only view of the statements in the current snapshot"""
+        return self.snapshot().statements
+
+    @property
+    def transactions(self) -> Mapping[str, Transaction]:
+        """Read-only view of the transactions in the current snapshot"""
+        return self.snapshot().transactions
+
+    def snapshot(self) -> DatabaseSnapshot:
+        """Get the current consistent snapshot"""
+        current = self._snapshot
+        # Poll the store for writes from other workers. This never takes the
+        # write lock, so readers do not wait for writers holding it
+        if self._store and self._store.version() != current.version:
+            self._catch_up(current)
+        return self._snapshot
+
+    def _catch_up(self, base: DatabaseSnapshot) -> None:
+        """Merge statements written since a snapshot and publish if it is still current"""
+        # Reads in its own transaction, so no lock is needed
+        version, statements = self._store.load_changes(base.version)
+        if version == base.version:
+            return
+        self._publish(version, *self._merge(statements, base), base=base)
+
+    def _load_store_changes(self) -> None:
+        """Catch up with the store (caller must hold the write lock and the store's)"""
+        # A reader may publish an older catch-up in between; repeat until
+        # every committed write is included before building on the snapshot
+        while self._snapshot.version != self._store.version():
+            self._catch_up(self._snapshot)
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """Hold the write lock, catching up with the store first"""
+        with self._lock:
+            self._pending = None
+            if self._store:
+                # The store's write lock serializes writes across workers
+                with self._store.write():
+                    self._load_store_changes()
+                    yield
+            else:
+                yield
+
+            # Publish only once the write is committed
+            if self._pending:
+                self._publish(*self._pending)
+                self._pending = None
+
+    def _merge(self, new_statements: List[Statement], base: Optional[DatabaseSnapshot] = None) -> Tuple[
+        Dict[str, Statement], Dict[str, Mapping[str, Transaction]], Dict[str, StatementSummary], SearchIndex
+    ]:
+        """Copy a snapshot's top-level maps (the current one by default) with statements added or replaced"""
+        current = base or self._snapshot
+        statements = dict(current.statements)
+        statement_transactions = dict(current.statement_transactions)
+        statement_summaries = dict(current.statement_summaries)
+
+        reindex = []
+        for statement in new_statements:
+            previous = statements.get(statement.id)
+            statements[statement.id] = statement
+            statement_transactions[statement.id] = MappingProxyType(
+                {transaction.id: transaction for transaction in statement.transactions}
+            )
+            summary = StatementSummary.of(statement)
+            if summary:
+                statement_summaries[statement.id] = summary
+            else:
+                statement_summaries.pop(statement.id, None)
+
+            # Category-only changes leave the description index as it is
+            if not previous or _descriptions(previous) != _descriptions(statement):
+                reindex.append(statement)
+
+        search_index = current.search_index.with_statements(reindex) if reindex else current.search_index
+
+        return statements, statement_transactions, statement_summaries, search_index
+
+    def _save(self, new_statements: List[Statement]) -> None:
+        """Persist added or replaced statements (caller must be in _write)"""
+        merged = self._merge(new_statements)
+        if self._store:
+            version = self._store.save_statements(new_statements)
+        else:
+            version = self._snapshot.version + 1
+        self._pending = (version, *merged)
+
+    def _publish(
+        self,
+        version: int,
+        statements: Mapping[str, Statement],
+        statement_transactions: Mapping[str, Mapping[str, Transaction]],
+        statement_summaries: Mapping[str, StatementSummary],
+        search_index: SearchIndex,
+        base: Optional[DatabaseSnapshot] = None
+    ) -> None:
+        """
+        Swap in a new snapshot
+
+        Args:
+            base: Snapshot the new one was built from; if given, the swap only
+                happens while that snapshot is still current
+        """
+        with self._publish_lock:
+            if base is not None and self._snapshot is not base:
+                return
+            # A reader may already have published this write from the store
+            if version <= self._snapshot.version:
+                return
+            self._snapshot = DatabaseSnapshot(
+                version,
+                statements,
+                statement_transactions,
+                statement_summaries,
+                search_index
+            )
+
     def add_statement(self, statement: Statement) -> str:
         """Add a statement to the database"""
-        with self._lock:
-            # Store statement
-            self.statements[statement.id] = statement
-            
-            # Index transactions for quick access
-            for transaction in statement.transactions:
-                self.transactions[transaction.id] = transaction
-                
+        with self._write():
+            self._save([statement])
             return statement.id
-    
+
     def get_statement(self, statement_id: str) -> Optional[Statement]:
         """Get a statement by ID"""
-        return self.statements.get(statement_id)
-    
+        return self.snapshot().statements.get(statement_id)
+
     def get_all_statements(self) -> StatementList:
         """Get all statements"""
-        return StatementList(statements=list(self.statements.values()))
-    
+        return StatementList(statements=list(self.snapshot().statements.values()))
+
     def get_transaction(self, transaction_id: str) -> Optional[Transaction]:
         """Get a transaction by ID"""
-        return self.transactions.get(transaction_id)
-    
-    def update_transaction_category(self, transaction_id: str, category: str) -> bool:
+        found = self.snapshot().find_transaction(transaction_id)
+        return found[1] if found else None
+
+    def search_transactions(
+        self,
+        query: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        category: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[int, List[Tuple[str, Transaction]]]:
+        """
+        Search transaction descriptions
+
+        Args:
+            query: Search terms, all of which must match (see SearchIndex.search)
+            start_date: Earliest post date (inclusive)
+            end_date: Latest post date (inclusive)
+            min_amount: Smallest amount (inclusive)
+            max_amount: Largest amount (inclusive)
+            category: Only transactions in this category
+            limit: Maximum number of results
+
+        Returns:
+            Tuple of (number of matches, newest matches as (statement ID, transaction))
+        """
+        snapshot = self.snapshot()
+
+        # Skip whole statements whose ranges rule out every transaction
+        candidates = {}
+        for statement_id, summary in snapshot.statement_summaries.items():
+            if start_date and summary.last_post_date.date() < start_date:
+                continue
+            if end_date and summary.first_post_date.date() > end_date:
+                continue
+            if min_amount is not None and summary.max_amount < min_amount:
+                continue
+            if max_amount is not None and summary.min_amount > max_amount:
+                continue
+            if category and category not in summary.categories:
+                continue
+            candidates[statement_id] = summary
+
+        matches = sorted(
+            snapshot.search_index.search_statements(query, candidates.keys()),
+            key=lambda match: candidates[match[0]].last_post_date,
+            reverse=True
+        )
+
+        # Newest first; heap of (post date, order, statement ID, transaction)
+        newest = []
+        order = count()
+        total = 0
+        for statement_id, transaction_ids in matches:
+            summary = candidates[statement_id]
+            transactions = snapshot.statement_transactions[statement_id]
+            if category:
+                transaction_ids = transaction_ids & summary.categories[category]
+                if not transaction_ids:
+                    continue
+
+            # Statements entirely inside the date and amount filters are
+            # counted without visiting rows, and skipped once they cannot
+            # reach the newest
+            covered = (
+                (not start_date or summary.first_post_date.date() >= start_date)
+                and (not end_date or summary.last_post_date.date() <= end_date)
+                and (min_amount is None or summary.min_amount >= min_amount)
+                and (max_amount is None or summary.max_amount <= max_amount)
+            )
+            if covered:
+                total += len(transaction_ids)
+                if len(newest) >= limit and summary.last_post_date < newest[0][0]:
+                    continue
+
+            for transaction_id in transaction_ids:
+                transaction = transactions[transaction_id]
+                if not covered:
+                    if min_amount is not None and transaction.amount < min_amount:
+                        continue
+                    if max_amount is not None and transaction.amount > max_amount:
+                        continue
+                    post_date = transaction.post_date.date()
+                    if start_date and post_date < start_date:
+                        continue
+                    if end_date and post_date > end_date:
+                        continue
+                    total += 1
+
+                entry = (transaction.post_date, -next(order), statement_id, transaction)
+                if len(newest) < limit:
+                    heapq.heappush(newest, entry)
+                elif entry[0] > newest[0][0]:
+                    heapq.heapreplace(newest, entry)
+
+        newest.sort(reverse=True)
+        return total, [(statement_id, transaction) for _, _, statement_id, transaction in newest]
+
+    def update_transaction_category(
+        self,
+        transaction_id: str,
+        category: str,
+        user_categorized: bool = True
+    ) -> bool:
         """Update transaction category"""
-        with self._lock:
-            transaction = self.transactions.get(transaction_id)
-            if not transaction:
-                return False
-            
-            transaction.category = category
-            return True
+        return self.update_transaction_categories(
+            {transaction_id: category},
+            user_categorized=user_categorized
+        ) == 1
+
+    def update_transaction_categories(
+        self,
+        categories: Dict[str, str],
+        user_categorized: bool = False
+    ) -> int:
+        """
+        Update the category of several transactions in one snapshot
+
+        Args:
+            categories: Mapping of transaction ID to new category
+            user_categorized: Whether the categories come from the user.
+                Automatic updates skip transactions the user categorized.
+
+        Returns:
+            Number of transactions that were found and updated
+        """
+        with self._write():
+            current = self._snapshot
+
+            # Resolve IDs through the statements holding them
+            remaining = dict(categories)
+            changed_statements: Dict[str, Dict[str, Transaction]] = {}
+            for statement_id, transactions in current.statement_transactions.items():
+                if not remaining:
+                    break
+                for transaction_id in remaining.keys() & transactions.keys():
+                    category = remaining.pop(transaction_id)
+                    transaction = transactions[transaction_id]
+                    if transaction.user_categorized and not user_categorized:
+                        continue
+
+                    # Published transactions are never mutated; replace them with copies
+                    changed_statements.setdefault(statement_id, {})[transaction_id] = transaction.model_copy(
+                        update={"category": category, "user_categorized": user_categorized}
+                    )
+
+            if not changed_statements:
+                return 0
+
+            self._save([
+                current.statements[statement_id].model_copy(update={
+                    "transactions": [
+                        updated.get(t.id, t) for t in current.statements[statement_id].transactions
+                    ]
+                })
+                for statement_id, updated in changed_statements.items()
+            ])
+            return sum(len(updated) for updated in changed_statements.values())
+
+def _descriptions(statement: Statement) -> List[Tuple[str, str]]:
+    """Indexed content of a statement: (transaction ID, description) pairs"""
+    return [(transaction.id, transaction.description) for transaction in statement.transactions]
 
 # Singleton database instance
 _db_instance = None
@@ -55,9 +476,11 @@ def get_db() -> Database:
     if _db_instance is None:
         with _db_lock:
             if _db_instance is None:
-                _db_instance = Database()
+                # Share state through SQLite when running several workers
+                db_path = os.environ.get("DATABASE_PATH")
+                _db_instance = Database(SQLiteStore(db_path) if db_path else None)
     return _db_instance
 
 def init_db() -> None:
     """Initialize the database"""
-    get_db() 
\ No newline at end of file
+    get_db()
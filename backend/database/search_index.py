@@ -0,0 +1,176 @@
+# Search index module
+from bisect import bisect_left
+from typing import AbstractSet, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+import re
+from models.models import Statement
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized (lowercase alphanumeric) tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class SearchIndex:
+    """
+    Immutable inverted index over transaction descriptions
+
+    Two levels keep writes cheap: each statement has its own segment mapping
+    tokens to its transaction IDs, and global postings map tokens to the
+    statements containing them. Adding a statement builds one segment and
+    touches only the postings of its tokens; unchanged segments are shared
+    between index versions.
+    """
+
+    __slots__ = ("segments", "postings", "vocabulary", "_expansions")
+
+    # Query terms whose expansion is cached per index version
+    MAX_CACHED_EXPANSIONS = 256
+
+    def __init__(
+        self,
+        segments: Optional[Dict[str, Dict[str, Tuple[str, ...]]]] = None,
+        postings: Optional[Dict[str, FrozenSet[str]]] = None,
+        vocabulary: Optional[List[str]] = None
+    ):
+        # Statement ID -> token -> transaction IDs
+        self.segments = segments or {}
+        # Token -> IDs of statements containing it
+        self.postings = postings or {}
+        # Sorted tokens, for prefix lookups
+        self.vocabulary = vocabulary or []
+        # Term -> (statements containing a matching token, matching tokens);
+        # valid for the lifetime of this immutable index
+        self._expansions: Dict[str, Tuple[FrozenSet[str], List[str]]] = {}
+
+    def with_statements(self, statements: Iterable[Statement]) -> "SearchIndex":
+        """Get a new index with statements added or replaced"""
+        segments = dict(self.segments)
+        postings = dict(self.postings)
+        vocabulary_changed = False
+
+        for statement in statements:
+            old_segment = segments.get(statement.id, {})
+            segment = self._build_segment(statement)
+            segments[statement.id] = segment
+
+            for token in old_segment.keys() - segment.keys():
+                remaining = postings[token] - {statement.id}
+                if remaining:
+                    postings[token] = remaining
+                else:
+                    del postings[token]
+                    vocabulary_changed = True
+
+            for token in segment.keys() - old_segment.keys():
+                existing = postings.get(token)
+                if existing is None:
+                    postings[token] = frozenset((statement.id,))
+                    vocabulary_changed = True
+                else:
+                    postings[token] = existing | {statement.id}
+
+        vocabulary = sorted(postings) if vocabulary_changed else self.vocabulary
+        return SearchIndex(segments, postings, vocabulary)
+
+    def _build_segment(self, statement: Statement) -> Dict[str, Tuple[str, ...]]:
+        segment: Dict[str, List[str]] = {}
+        for transaction in statement.transactions:
+            for token in set(tokenize(transaction.description)):
+                segment.setdefault(token, []).append(transaction.id)
+        return {token: tuple(ids) for token, ids in segment.items()}
+
+    def _expand(self, term: str) -> Tuple[FrozenSet[str], List[str]]:
+        """
+        Statements and indexed tokens matching a term
+
+        A trailing '*' makes the term a prefix. Expansions are cached, so a
+        broad prefix only unions its postings once per index version.
+        """
+        cached = self._expansions.get(term)
+        if cached is not None:
+            return cached
+
+        if term.endswith("*"):
+            prefix = term[:-1]
+            start = bisect_left(self.vocabulary, prefix)
+            end = start
+            while end < len(self.vocabulary) and self.vocabulary[end].startswith(prefix):
+                end += 1
+            tokens = self.vocabulary[start:end]
+        else:
+            tokens = [term] if term in self.postings else []
+        statements = frozenset().union(*(self.postings[token] for token in tokens))
+
+        if len(self._expansions) >= self.MAX_CACHED_EXPANSIONS:
+            self._expansions.clear()
+        self._expansions[term] = (statements, tokens)
+        return statements, tokens
+
+    def search(self, query: str) -> Iterator[Tuple[str, str]]:
+        """
+        Find transactions whose description contains every query term
+
+        Args:
+            query: Terms separated by whitespace; 'CARG*' matches any
+                token starting with 'carg'
+
+        Yields:
+            Tuples of (statement ID, transaction ID)
+        """
+        for statement_id, transaction_ids in self.search_statements(query):
+            for transaction_id in transaction_ids:
+                yield statement_id, transaction_id
+
+    def search_statements(
+        self,
+        query: str,
+        statement_ids: Optional[AbstractSet[str]] = None
+    ) -> Iterator[Tuple[str, Set[str]]]:
+        """
+        Find matching transactions grouped by statement
+
+        Args:
+            query: Search terms, see search()
+            statement_ids: Only search these statements
+
+        Yields:
+            Tuples of (statement ID, IDs of its matching transactions)
+        """
+        terms = []
+        for term in query.split():
+            tokens = tokenize(term)
+            # Only a term's own last token becomes a prefix, never a previous term's
+            if tokens and term.endswith("*"):
+                tokens[-1] += "*"
+            terms.extend(tokens)
+
+        if not terms:
+            return
+
+        # Tokens each term matches, most selective term first
+        expanded = []
+        for term in terms:
+            statements, tokens = self._expand(term)
+            if not tokens:
+                return
+            expanded.append((statements, tokens))
+        expanded.sort(key=lambda entry: len(entry[0]))
+
+        candidates = expanded[0][0]
+        for statements, _ in expanded[1:]:
+            candidates = candidates & statements
+        if statement_ids is not None:
+            candidates = candidates & statement_ids
+
+        for statement_id in candidates:
+            segment = self.segments[statement_id]
+            matched = None
+            for _, tokens in expanded:
+                ids = set()
+                for token in tokens:
+                    ids.update(segment.get(token, ()))
+                matched = ids if matched is None else matched & ids
+                if not matched:
+                    break
+            if matched:
+                yield statement_id, matched
@@ -0,0 +1,197 @@
+# SQLite store module
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import sqlite3
+import threading
+import time
+from models.models import Statement
+
+class SQLiteStore:
+    """
+    SQLite storage shared by several worker processes
+
+    Every write bumps a global version number and stamps the statements it
+    wrote with it, so a worker can pick up other workers' changes by loading
+    only the statements newer than the version it already has.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # sqlite3 connections must not be shared between threads
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS statements (
+                id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS statements_version ON statements (version);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            CREATE TABLE IF NOT EXISTS jobs (
+                name TEXT PRIMARY KEY,
+                owner TEXT,
+                lease_until REAL NOT NULL DEFAULT 0,
+                rerun INTEGER NOT NULL DEFAULT 0,
+                status TEXT
+            );
+        """)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            # WAL lets readers in other workers proceed while one worker writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def version(self) -> int:
+        """Get the version of the last committed write"""
+        return self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()[0]
+
+    def load_changes(self, since: int) -> Tuple[int, List[Statement]]:
+        """
+        Load statements written after a version
+
+        Args:
+            since: Version the caller already has
+
+        Returns:
+            Tuple of (current version, statements written since then)
+        """
+        conn = self._connection()
+        # Read version and rows in one transaction (possibly the caller's write)
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN")
+        try:
+            version = self.version()
+            rows = conn.execute(
+                "SELECT data FROM statements WHERE version > ?", (since,)
+            ).fetchall()
+        finally:
+            if own_transaction:
+                conn.execute("COMMIT")
+
+        return version, [Statement.model_validate_json(data) for (data,) in rows]
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the cross-process write lock for the duration of a write"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def save_statements(self, statements: List[Statement]) -> int:
+        """
+        Insert or replace statements (must be called inside write())
+
+        Returns:
+            The new version
+        """
+        conn = self._connection()
+        version = self.version() + 1
+        conn.executemany(
+            "INSERT OR REPLACE INTO statements (id, version, data) VALUES (?, ?, ?)",
+            [(statement.id, version, statement.model_dump_json()) for statement in statements]
+        )
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (version,))
+        return version
+
+    def acquire_job(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Take the lease on a background job
+
+        Only one worker holds a job's lease at a time. If another worker holds
+        it, that worker is asked to run the job again when it finishes.
+
+        Returns:
+            True if the caller now holds the lease
+        """
+        conn = self._connection()
+        now = time.time()
+        with self.write():
+            row = conn.execute(
+                "SELECT owner, lease_until FROM jobs WHERE name = ?", (name,)
+            ).fetchone()
+            if row and row[0] and row[1] > now:
+                conn.execute("UPDATE jobs SET rerun = 1 WHERE name = ?", (name,))
+                return False
+
+            conn.execute(
+                """INSERT INTO jobs (name, owner, lease_until, rerun) VALUES (?, ?, ?, 0)
+                   ON CONFLICT (name) DO UPDATE SET
+                       owner = excluded.owner, lease_until = excluded.lease_until, rerun = 0""",
+                (name, owner, now + lease_seconds)
+            )
+            return True
+
+    def update_job(self, name: str, owner: str, lease_seconds: float, status: Dict) -> bool:
+        """
+        Renew a held lease and record the job's status
+
+        Returns:
+            False if the caller no longer holds the lease
+        """
+        with self.write():
+            cursor = self._connection().execute(
+                "UPDATE jobs SET lease_until = ?, status = ? WHERE name = ? AND owner = ?",
+                (time.time() + lease_seconds, json.dumps(status), name, owner)
+            )
+            return cursor.rowcount == 1
+
+    def finish_job(self, name: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Release a held lease, unless another run was asked for meanwhile
+
+        Returns:
+            True if the caller keeps the lease and should run the job again
+        """
+        conn = self._connection()
+        with self.write():
+            row = conn.execute(
+                "SELECT rerun FROM jobs WHERE name = ? AND owner = ?", (name, owner)
+            ).fetchone()
+            if row is None:
+                return False
+            if row[0]:
+                conn.execute(
+                    "UPDATE jobs SET rerun = 0, lease_until = ? WHERE name = ?",
+                    (time.time() + lease_seconds, name)
+                )
+                return True
+            conn.execute("UPDATE jobs SET owner = NULL, lease_until = 0 WHERE name = ?", (name,))
+            return False
+
+    def job_status(self, name: str) -> Optional[Tuple[Dict, bool]]:
+        """
+        Get a job's last recorded status
+
+        Returns:
+            Tuple of (status, whether a worker holds the lease), or None if
+            the job never recorded a status
+        """
+        row = self._connection().execute(
+            "SELECT status, owner, lease_until FROM jobs WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        status, owner, lease_until = row
+        return json.loads(status), bool(owner) and lease_until > time.time()
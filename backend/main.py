@@ -1,14 +1,18 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Query
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, Query, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 import os
 import uvicorn
 import tempfile
+from datetime import date
 from typing import List, Optional
 
 from services.pdf_service import PDFService
 from services.category_service import CategoryService
+from services.recategorization_service import RecategorizationService
+from services.export_service import ExportService
+from services.profiling_service import ProfilingService
 from models.models import StatementList, Statement, Transaction, TransactionUpdate
 from database.database import get_db, init_db, Database
 
@@ -26,15 +30,54 @@ app.add_middleware(
 # Services
 pdf_service = PDFService()
 category_service = CategoryService()
+recategorization_service = RecategorizationService(category_service)
+export_service = ExportService()
+# None unless PROFILING_TOKEN is set
+profiling_service = ProfilingService.from_env()
+
+# Hot paths that can be profiled on demand, by request path
+PROFILED_ENDPOINTS = {
+    "/statements/upload": "upload_statement",
+    "/analytics/summary": "get_summary",
+    "/analytics/compare": "compare_statements",
+}
+
+# Profiling middleware is only installed when profiling is enabled, so
+# normal requests pay nothing otherwise
+if profiling_service:
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Profile a request sent with the admin X-Profile header or ?profile= flag"""
+        endpoint = PROFILED_ENDPOINTS.get(request.url.path)
+        token = request.headers.get("X-Profile") or request.query_params.get("profile")
+        if not endpoint or not token:
+            return await call_next(request)
+        
+        if not profiling_service.is_authorized(token):
+            return JSONResponse(status_code=403, content={"detail": "Invalid profiling token"})
+        if not profiling_service.acquire():
+            # Another profile in flight or over the rate limit: serve the
+            # request without profiling
+            return await call_next(request)
+        
+        with profiling_service.profile(endpoint) as profile_id:
+            response = await call_next(request)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
 
 # Initialize database on startup
 @app.on_event("startup")
 async def startup():
     init_db()
+    os.makedirs("./temp_pdfs", exist_ok=True)
+    
+    # PDF and ML libraries load on first use unless warm-up is requested
+    if os.environ.get("WARM_UP_SERVICES", "").lower() in ("1", "true", "yes"):
+        pdf_service.warm_up()
+        category_service.warm_up()
 
-# Mount static files directory for PDF viewer
-os.makedirs("./temp_pdfs", exist_ok=True)
-app.mount("/pdfs", StaticFiles(directory="temp_pdfs"), name="pdfs")
+# Mount static files directory for PDF viewer (created on startup)
+app.mount("/pdfs", StaticFiles(directory="temp_pdfs", check_dir=False), name="pdfs")
 
 @app.get("/")
 async def root():
@@ -87,6 +130,67 @@ async def get_statement(statement_id: str, db: Database = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Statement not found")
     return statement
 
+@app.get("/transactions/export")
+async def export_transactions(
+    format: str = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    statement_id: Optional[str] = None,
+    db: Database = Depends(get_db)
+):
+    """Stream transactions as CSV, NDJSON or Parquet"""
+    if format not in export_service.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Use one of: {', '.join(export_service.MEDIA_TYPES)}"
+        )
+    
+    # Rows are read from one snapshot and serialized batch by batch
+    rows = export_service.iter_transactions(
+        db.snapshot(),
+        start_date=start_date,
+        end_date=end_date,
+        category=category,
+        statement_id=statement_id
+    )
+    
+    return StreamingResponse(
+        export_service.stream(rows, format),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=transactions.{format}"}
+    )
+
+@app.get("/transactions/search")
+async def search_transactions(
+    q: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Database = Depends(get_db)
+):
+    """Search transaction descriptions, e.g. q=CARGILLS or q=CARG*"""
+    total, matches = db.search_transactions(
+        q,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        category=category,
+        limit=limit
+    )
+    
+    return {
+        "total": total,
+        "results": [
+            {"statement_id": statement_id, "transaction": transaction}
+            for statement_id, transaction in matches
+        ]
+    }
+
 @app.put("/transactions/{transaction_id}")
 async def update_transaction(
     transaction_id: str, 
@@ -105,11 +209,23 @@ async def update_transaction(
     # Update categorization model with new data
     if transaction_update.learn:
         transaction = db.get_transaction(transaction_id)
-        if transaction:
-            category_service.learn(transaction.description, transaction_update.category)
+        # Apply a retrained model to already stored transactions
+        if transaction and category_service.learn(transaction.description, transaction_update.category):
+            recategorization_service.start(db)
     
     return {"message": "Transaction updated successfully"}
 
+@app.post("/transactions/recategorize")
+async def recategorize_transactions(db: Database = Depends(get_db)):
+    """Re-categorize stored transactions in the background"""
+    started = recategorization_service.start(db)
+    return {"started": started, "status": recategorization_service.status(db)}
+
+@app.get("/transactions/recategorize")
+async def get_recategorization_status(db: Database = Depends(get_db)):
+    """Get progress of the background re-categorization job"""
+    return recategorization_service.status(db)
+
 @app.get("/analytics/summary")
 async def get_summary(
     statement_id: Optional[str] = None,
@@ -192,8 +308,10 @@ async def compare_statements(
     
     comparison = []
     
+    # Read every statement from the same snapshot
+    snapshot = db.snapshot()
     for statement_id in statement_ids:
-        statement = db.get_statement(statement_id)
+        statement = snapshot.statements.get(statement_id)
         if not statement:
             raise HTTPException(status_code=404, detail=f"Statement {statement_id} not found")
         
@@ -214,5 +332,26 @@ async def compare_statements(
     
     return {"comparison": comparison}
 
+def require_profiling_admin(x_profile: Optional[str] = Header(None)) -> ProfilingService:
+    """Check the admin token for profile downloads"""
+    if not profiling_service:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    if not profiling_service.is_authorized(x_profile):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    return profiling_service
+
+@app.get("/admin/profiles")
+async def list_profiles(profiler: ProfilingService = Depends(require_profiling_admin)):
+    """List saved request profiles"""
+    return {"profiles": profiler.list_profiles()}
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, profiler: ProfilingService = Depends(require_profiling_admin)):
+    """Download a saved profile (pstats format)"""
+    path = profiler.path_for(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -10,6 +10,7 @@ class Transaction(BaseModel):
     description: str
     amount: float
     category: str = "Other"  # Default category
+    user_categorized: bool = False  # Category was set by the user, not the categorizer
 
 class TransactionUpdate(BaseModel):
     category: str
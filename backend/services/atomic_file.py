@@ -0,0 +1,31 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+@contextmanager
+def atomic_write(path: str, mode: str = "w") -> Iterator[IO]:
+    """
+    Open a file for writing that replaces path atomically on success
+
+    Writes go to a uniquely named temporary file in the same directory, so
+    concurrent writers (threads or worker processes) never share one and
+    readers never see a partial file.
+
+    Args:
+        path: File to replace
+        mode: "w" for text or "wb" for binary
+
+    Yields:
+        The open temporary file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
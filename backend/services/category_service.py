@@ -1,16 +1,24 @@
 import re
-from typing import Dict, List, Set
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, TYPE_CHECKING
 import json
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import numpy as np
+import hashlib
+import threading
+
+from services.atomic_file import atomic_write
+
+# scikit-learn is imported on first use of the model to keep startup fast
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
 
 class CategoryService:
     """Service for categorizing credit card transactions"""
     
-    def __init__(self):
+    # Bump when the pipeline or snapshot layout changes
+    MODEL_SNAPSHOT_VERSION = 1
+    
+    def __init__(self, model_path: Optional[str] = None):
         # Define keyword patterns for each category
         self.category_keywords = {
             "Grocery": [
@@ -100,23 +108,69 @@ class CategoryService:
             ]
         }
         
-        # Initialize machine learning model
-        self.model = Pipeline([
-            ('tfidf', TfidfVectorizer(ngram_range=(1, 2))),
-            ('clf', MultinomialNB())
-        ])
+        # Machine learning model, loaded or trained on first use
+        self._model = None
+        self._model_lock = threading.Lock()
         
         # Training data
         self.training_data = []
         self.training_labels = []
+        # Modification time of the training data file when last read or written
+        self._training_mtime = None
         
         # Load saved training data if available
-        self.model_path = os.path.join(os.path.dirname(__file__), "category_model.json")
+        self.model_path = model_path or os.path.join(os.path.dirname(__file__), "category_model.json")
         self.load_training_data()
         
-        # Train initial model
-        if self.training_data:
-            self.train_model()
+        # Fitted model snapshot stored next to the training data
+        self.snapshot_path = os.path.splitext(self.model_path)[0] + ".joblib"
+    
+    @property
+    def model(self) -> "Pipeline":
+        """Categorization model, loaded on first access"""
+        if self._model is None:
+            self.warm_up()
+        return self._model
+    
+    @model.setter
+    def model(self, model: "Pipeline") -> None:
+        self._model = model
+    
+    def warm_up(self) -> None:
+        """Load the categorization model now instead of on first use"""
+        with self._model_lock:
+            if self._model is not None:
+                return
+            
+            # Load the fitted model, retraining only if the snapshot is missing or stale
+            if self.training_data and not self.load_model_snapshot():
+                self.train_model()
+            
+            if self._model is None:
+                self._model = self._build_model()
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Pick up training data saved by another worker process
+        
+        Returns:
+            True if the training data changed on disk and was reloaded
+        """
+        try:
+            mtime = os.stat(self.model_path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._training_mtime:
+            return False
+        
+        with self._model_lock:
+            self.load_training_data()
+            
+            # Swap in the other worker's model if ours was already loaded;
+            # otherwise it is loaded on first use
+            if self._model is not None and self.training_data and not self.load_model_snapshot():
+                self.train_model()
+        return True
     
     def categorize(self, description: str) -> str:
         """
@@ -128,15 +182,12 @@ class CategoryService:
         Returns:
             Category: One of the defined categories or "Other"
         """
-        # Check if it's a credit card payment (ending with CR)
-        if description.strip().endswith("CR") or "PAYMENT" in description and "CR" in description:
-            return "Payment"
+        self.reload_if_changed()
         
         # First try rule-based categorization
-        for category, keywords in self.category_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in description.lower():
-                    return category
+        category = self._rule_category(description)
+        if category:
+            return category
         
         # If rule-based fails and we have a trained model, use ML
         if self.training_data and len(self.training_data) > 10:
@@ -150,6 +201,49 @@ class CategoryService:
         # Default to "Other"
         return "Other"
     
+    def categorize_batch(self, descriptions: List[str]) -> List[str]:
+        """
+        Categorize many transactions at once
+        
+        Rules are applied per description; everything the rules miss goes
+        through the model in a single predict call.
+        
+        Args:
+            descriptions: Transaction descriptions
+            
+        Returns:
+            Categories in the same order as the descriptions
+        """
+        self.reload_if_changed()
+        
+        categories = [self._rule_category(description) for description in descriptions]
+        unmatched = [i for i, category in enumerate(categories) if category is None]
+        
+        if unmatched and self.training_data and len(self.training_data) > 10:
+            # Use one model reference for the whole batch
+            model = self.model
+            try:
+                predicted = model.predict([descriptions[i] for i in unmatched])
+                for i, category in zip(unmatched, predicted):
+                    categories[i] = category
+            except:
+                pass
+        
+        return [category or "Other" for category in categories]
+    
+    def _rule_category(self, description: str) -> Optional[str]:
+        """Rule-based categorization, or None if no rule matches"""
+        # Check if it's a credit card payment (ending with CR)
+        if description.strip().endswith("CR") or "PAYMENT" in description and "CR" in description:
+            return "Payment"
+        
+        for category, keywords in self.category_keywords.items():
+            for keyword in keywords:
+                if keyword.lower() in description.lower():
+                    return category
+        
+        return None
+    
     def learn(self, description: str, category: str) -> bool:
         """
         Learn from user feedback
@@ -159,27 +253,81 @@ class CategoryService:
             category: Correct category
             
         Returns:
-            True if learning was successful
+            True if the model was retrained, so stored transactions may
+            need re-categorizing
         """
-        # Add to training data
-        self.training_data.append(description)
-        self.training_labels.append(category)
-        
-        # Retrain model if we have enough data
-        if len(self.training_data) >= 10:
-            self.train_model()
-        
-        # Save training data
-        self.save_training_data()
+        # Hold the lock from reading to rewriting the training data so
+        # concurrent corrections in other workers are not overwritten
+        with self._training_lock():
+            # Start from the latest corrections of all workers
+            self.load_training_data()
+            
+            # Add to training data
+            self.training_data.append(description)
+            self.training_labels.append(category)
+            
+            # Retrain model if we have enough data
+            retrained = len(self.training_data) >= 10 and self.train_model()
+            
+            # Save training data
+            self.save_training_data()
         
-        return True
+        return retrained
     
-    def train_model(self) -> None:
-        """Train the categorization model"""
+    @contextmanager
+    def _training_lock(self) -> Iterator[None]:
+        """Hold the cross-process lock on the training data file"""
+        with open(f"{self.model_path}.lock", "a+b") as lock_file:
+            if os.name == "nt":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if os.name == "nt":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def train_model(self) -> bool:
+        """
+        Train the categorization model
+        
+        Returns:
+            True if a new model was fitted
+        """
+        # Training can run on request and background threads at once; fit
+        # and fingerprint the same copy of the data
+        training_data = list(self.training_data)
+        training_labels = list(self.training_labels)
         try:
-            self.model.fit(self.training_data, self.training_labels)
+            # Fit a fresh pipeline and swap it in so concurrent predictions
+            # never see a half-fitted model
+            model = self._build_model()
+            model.fit(training_data, training_labels)
+            self.model = model
         except Exception as e:
             print(f"Error training model: {e}")
+            return False
+        
+        self.save_model_snapshot(model, self._training_fingerprint(training_data, training_labels))
+        return True
+    
+    def _build_model(self) -> "Pipeline":
+        """Create an unfitted categorization pipeline"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+        
+        return Pipeline([
+            ('tfidf', TfidfVectorizer(ngram_range=(1, 2))),
+            ('clf', MultinomialNB())
+        ])
     
     def save_training_data(self) -> None:
         """Save training data to disk"""
@@ -189,8 +337,10 @@ class CategoryService:
                 "training_labels": self.training_labels
             }
             
-            with open(self.model_path, 'w') as f:
+            # Replace atomically so other workers never read a partial file
+            with atomic_write(self.model_path) as f:
                 json.dump(data, f)
+            self._training_mtime = os.stat(self.model_path).st_mtime_ns
         except Exception as e:
             print(f"Error saving training data: {e}")
     
@@ -198,6 +348,7 @@ class CategoryService:
         """Load training data from disk"""
         try:
             if os.path.exists(self.model_path):
+                self._training_mtime = os.stat(self.model_path).st_mtime_ns
                 with open(self.model_path, 'r') as f:
                     data = json.load(f)
                 
@@ -207,4 +358,67 @@ class CategoryService:
             print(f"Error loading training data: {e}")
             # Initialize empty if loading fails
             self.training_data = []
-            self.training_labels = [] 
\ No newline at end of file
+            self.training_labels = []
+    
+    def save_model_snapshot(self, model: Optional["Pipeline"] = None, fingerprint: Optional[str] = None) -> None:
+        """
+        Save the fitted model to disk
+        
+        Args:
+            model: Fitted model, the current one by default
+            fingerprint: Fingerprint of the data the model was fitted on,
+                the current training data's by default
+        """
+        try:
+            import joblib
+            import sklearn
+            
+            snapshot = {
+                "version": self.MODEL_SNAPSHOT_VERSION,
+                "sklearn_version": sklearn.__version__,
+                "fingerprint": fingerprint or self._training_fingerprint(),
+                "model": model if model is not None else self.model
+            }
+            
+            # Write to a temporary file first so readers never see a partial snapshot
+            with atomic_write(self.snapshot_path, "wb") as f:
+                joblib.dump(snapshot, f)
+        except Exception as e:
+            print(f"Error saving model snapshot: {e}")
+    
+    def load_model_snapshot(self) -> bool:
+        """
+        Load the fitted model from disk
+        
+        Returns:
+            True if a snapshot matching the current training data was loaded
+        """
+        try:
+            if not os.path.exists(self.snapshot_path):
+                return False
+            
+            import joblib
+            import sklearn
+            
+            snapshot = joblib.load(self.snapshot_path, mmap_mode='r')
+            if (snapshot.get("version") != self.MODEL_SNAPSHOT_VERSION
+                    or snapshot.get("sklearn_version") != sklearn.__version__
+                    or snapshot.get("fingerprint") != self._training_fingerprint()):
+                return False
+            
+            self.model = snapshot["model"]
+            return True
+        except Exception as e:
+            print(f"Error loading model snapshot: {e}")
+            return False
+    
+    def _training_fingerprint(
+        self,
+        training_data: Optional[List[str]] = None,
+        training_labels: Optional[List[str]] = None
+    ) -> str:
+        """Hash of the training data the model is fitted on (the current data by default)"""
+        if training_data is None:
+            training_data, training_labels = self.training_data, self.training_labels
+        data = json.dumps([training_data, training_labels])
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
@@ -0,0 +1,173 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator, List, Optional, Tuple
+
+from database.database import DatabaseSnapshot
+from models.models import Transaction
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that hands back written bytes in chunks"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class ExportService:
+    """Service for streaming transaction exports"""
+
+    # Supported formats and their media types
+    MEDIA_TYPES = {
+        "csv": "text/csv",
+        "ndjson": "application/x-ndjson",
+        "parquet": "application/vnd.apache.parquet"
+    }
+
+    COLUMNS = ["id", "statement_id", "post_date", "inv_date", "description", "amount", "category"]
+
+    def __init__(self, batch_size: int = 5000):
+        # Rows serialized per chunk (and per Parquet row group)
+        self.batch_size = batch_size
+
+    def iter_transactions(
+        self,
+        snapshot: DatabaseSnapshot,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category: Optional[str] = None,
+        statement_id: Optional[str] = None
+    ) -> Iterator[Tuple[str, Transaction]]:
+        """
+        Iterate transactions matching the filters
+
+        Args:
+            snapshot: Database snapshot to read from
+            start_date: Earliest post date (inclusive)
+            end_date: Latest post date (inclusive)
+            category: Only transactions in this category
+            statement_id: Only transactions of this statement
+
+        Yields:
+            Tuples of (statement ID, transaction)
+        """
+        if statement_id:
+            statement = snapshot.statements.get(statement_id)
+            statements = [statement] if statement else []
+        else:
+            statements = snapshot.statements.values()
+
+        for statement in statements:
+            for transaction in statement.transactions:
+                if category and transaction.category != category:
+                    continue
+                post_date = transaction.post_date.date()
+                if start_date and post_date < start_date:
+                    continue
+                if end_date and post_date > end_date:
+                    continue
+                yield statement.id, transaction
+
+    def stream(self, rows: Iterator[Tuple[str, Transaction]], format: str) -> Iterator[bytes]:
+        """Serialize rows in the given format, one chunk per batch"""
+        if format == "csv":
+            return self._stream_csv(rows)
+        if format == "ndjson":
+            return self._stream_ndjson(rows)
+        if format == "parquet":
+            return self._stream_parquet(rows)
+        raise ValueError(f"Unsupported export format: {format}")
+
+    def _batches(self, rows: Iterator[Tuple[str, Transaction]]) -> Iterator[List[Tuple[str, Transaction]]]:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _stream_csv(self, rows: Iterator[Tuple[str, Transaction]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.COLUMNS)
+
+        for batch in self._batches(rows):
+            for statement_id, t in batch:
+                writer.writerow([
+                    t.id, statement_id, t.post_date.date().isoformat(), t.inv_date.date().isoformat(),
+                    t.description, t.amount, t.category
+                ])
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+
+        # Header only when nothing matched
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _stream_ndjson(self, rows: Iterator[Tuple[str, Transaction]]) -> Iterator[bytes]:
+        for batch in self._batches(rows):
+            lines = [
+                json.dumps({
+                    "id": t.id,
+                    "statement_id": statement_id,
+                    "post_date": t.post_date.date().isoformat(),
+                    "inv_date": t.inv_date.date().isoformat(),
+                    "description": t.description,
+                    "amount": t.amount,
+                    "category": t.category
+                })
+                for statement_id, t in batch
+            ]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _stream_parquet(self, rows: Iterator[Tuple[str, Transaction]]) -> Iterator[bytes]:
+        # pyarrow is only needed for Parquet exports
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([
+            ("id", pa.string()),
+            ("statement_id", pa.string()),
+            ("post_date", pa.date32()),
+            ("inv_date", pa.date32()),
+            ("description", pa.string()),
+            ("amount", pa.float64()),
+            ("category", pa.string())
+        ])
+
+        sink = _ChunkSink()
+        # Each batch becomes one row group and is flushed to the client
+        with pq.ParquetWriter(sink, schema) as writer:
+            for batch in self._batches(rows):
+                writer.write_table(pa.table({
+                    "id": [t.id for _, t in batch],
+                    "statement_id": [statement_id for statement_id, _ in batch],
+                    "post_date": [t.post_date.date() for _, t in batch],
+                    "inv_date": [t.inv_date.date() for _, t in batch],
+                    "description": [t.description for _, t in batch],
+                    "amount": [t.amount for _, t in batch],
+                    "category": [t.category for _, t in batch]
+                }, schema=schema))
+                yield sink.drain()
+
+        # Footer written on close
+        yield sink.drain()
@@ -0,0 +1,93 @@
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+from services.atomic_file import atomic_write
+
+class LayoutTemplate:
+    """Position of the transaction table in one issuer's statements"""
+
+    def __init__(
+        self,
+        key: str,
+        bbox: Tuple[float, float, float, float],
+        columns: Dict[str, float],
+        continuation_top: Optional[float] = None
+    ):
+        # Layout key identifying the issuer (see PDFService._layout_key)
+        self.key = key
+        # Transaction table region (x0, top, x1, bottom) in PDF points on the
+        # first page
+        self.bbox = bbox
+        # Table top on the following pages, None until such a page is seen
+        self.continuation_top = continuation_top
+        # Left edges of the post_date, inv_date and description columns, and
+        # the boundary past which a word belongs to the right-aligned amount
+        self.columns = columns
+
+    def page_bbox(self, page_number: int) -> Tuple[float, float, float, float]:
+        """Table region of a page (0-based page number)"""
+        x0, top, x1, bottom = self.bbox
+        if page_number > 0:
+            top = self.continuation_top or 0
+        return x0, top, x1, bottom
+
+    def to_dict(self) -> Dict:
+        return {
+            "key": self.key,
+            "bbox": list(self.bbox),
+            "continuation_top": self.continuation_top,
+            "columns": self.columns
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "LayoutTemplate":
+        return cls(data["key"], tuple(data["bbox"]), data["columns"], data.get("continuation_top"))
+
+class LayoutTemplateRegistry:
+    """Layout templates by issuer, persisted to a JSON file"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(os.path.dirname(__file__), "layout_templates.json")
+        self.templates: Dict[str, LayoutTemplate] = {}
+        self.load()
+
+    def get(self, key: str) -> Optional[LayoutTemplate]:
+        """Get the template for a layout key"""
+        return self.templates.get(key)
+
+    def put(self, template: LayoutTemplate) -> None:
+        """Add or replace a template and save the registry"""
+        self.templates[template.key] = template
+        self.save()
+
+    def remove(self, key: str) -> None:
+        """Forget a template that no longer matches its issuer's statements"""
+        if self.templates.pop(key, None):
+            self.save()
+
+    def save(self) -> None:
+        """Save templates to disk"""
+        try:
+            data = [template.to_dict() for template in self.templates.values()]
+
+            # Replace atomically so other workers never read a partial file
+            with atomic_write(self.path) as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"Error saving layout templates: {e}")
+
+    def load(self) -> None:
+        """Load templates from disk"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+
+                self.templates = {
+                    template.key: template
+                    for template in (LayoutTemplate.from_dict(item) for item in data)
+                }
+        except Exception as e:
+            print(f"Error loading layout templates: {e}")
+            self.templates = {}
@@ -1,16 +1,15 @@
 import os
 import re
 from datetime import datetime
-from typing import List, Optional
-import pdfplumber
-from pypdf import PdfReader
+from typing import Dict, List, Optional, Tuple
 
 from models.models import Statement, Transaction
+from services.layout_templates import LayoutTemplate, LayoutTemplateRegistry
 
 class PDFService:
     """Service for processing PDF credit card statements"""
     
-    def __init__(self):
+    def __init__(self, template_path: Optional[str] = None):
         # Pattern to match transaction rows in the statement
         # Using a two-step approach for transaction parsing
         self.transaction_date_pattern = re.compile(
@@ -20,9 +19,27 @@ class PDFService:
         self.transaction_amount_pattern = re.compile(
             r'(\d{1,3}(?:,\d{3})*\.\d{2}|\d+\.\d{2})(?:\s+CR)?$'
         )
+        self.date_pattern = re.compile(r'\d{2}/\d{2}/\d{4}')
         
         # Default password for encrypted PDFs
         self.default_password = "12345678"
+        
+        # Cached transaction table layouts by issuer
+        self.templates = LayoutTemplateRegistry(template_path)
+        # Max vertical offset (points) between words on the same row
+        self.row_tolerance = 3
+        # Max horizontal gap (points) between characters of one word, and
+        # slack when matching words to column edges
+        self.word_tolerance = 3
+        # Padding (points) around the learned table region
+        self.crop_margin = 2
+        # Height (points) above the table top searched for the column headers
+        self.header_strip = 20
+    
+    def warm_up(self) -> None:
+        """Import the PDF libraries now instead of on the first upload"""
+        import pdfplumber
+        import pypdf
     
     def process_pdf(self, pdf_path: str, password: Optional[str] = None) -> Statement:
         """
@@ -35,6 +52,10 @@ class PDFService:
         Returns:
             Statement object with extracted data
         """
+        # PDF libraries are imported on first use to keep startup fast
+        import pdfplumber
+        from pypdf import PdfReader
+        
         # Use provided password or default
         pdf_password = password if password else self.default_password
         
@@ -78,72 +99,337 @@ class PDFService:
         
         # Extract transactions using pdfplumber for better text extraction
         with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                
-                # Find the transaction section
-                if "POST DATE" in text and "INV. DATE" in text and "DESCRIPTION/REFERENCE NUMBER" in text and "AMOUNT" in text:
-                    # Process each line after the headers
-                    lines = text.split('\n')
-                    in_transaction_section = False
-                    
-                    for line in lines:
-                        if "POST DATE" in line and "INV. DATE" in line:
-                            in_transaction_section = True
-                            continue
-                        
-                        if in_transaction_section:
-                            # Skip non-transaction lines
-                            if "Page" in line or "Credit Card Statement" in line or not line.strip():
-                                continue
-                                
-                            # Try to match date pattern at the beginning of the line
-                            date_match = self.transaction_date_pattern.match(line)
-                            if not date_match:
-                                continue
-                                
-                            # Try to match amount pattern at the end of the line
-                            amount_match = self.transaction_amount_pattern.search(line)
-                            if not amount_match:
-                                continue
-                            
-                            # Extract dates
-                            post_date_str, inv_date_str = date_match.groups()
-                            
-                            # Extract amount
-                            amount_str = amount_match.group(1)
-                            
-                            # Extract description (everything between dates and amount)
-                            date_end = date_match.end()
-                            amount_start = amount_match.start()
-                            description = line[date_end:amount_start].strip()
-                            
-                            # Clean and convert data
-                            amount = float(amount_str.replace(',', ''))
-                            
-                            # Check if it's a credit transaction (ends with CR)
-                            is_credit = line.strip().endswith("CR")
-                            
-                            # Parse dates
-                            try:
-                                post_date = datetime.strptime(post_date_str, "%d/%m/%Y")
-                                inv_date = datetime.strptime(inv_date_str, "%d/%m/%Y")
-                            except ValueError:
-                                # Try alternate date format
-                                post_date = datetime.strptime(post_date_str, "%m/%d/%Y")
-                                inv_date = datetime.strptime(inv_date_str, "%m/%d/%Y")
-                            
-                            # Create transaction and add to statement
-                            transaction = Transaction(
-                                post_date=post_date,
-                                inv_date=inv_date,
-                                description=description,
-                                amount=amount
-                            )
-                            statement.transactions.append(transaction)
+            layout_key = self._layout_key(reader, pdf)
+            
+            # Known issuer: read only the cached table region of each page
+            template = self.templates.get(layout_key)
+            if template:
+                continuation_top = template.continuation_top
+                statement.transactions = self._extract_with_template(pdf, template)
+                if not statement.transactions:
+                    # The statement does not match the cached layout; learn it again
+                    self.templates.remove(layout_key)
+                elif template.continuation_top != continuation_top:
+                    self.templates.put(template)
+            
+            if not statement.transactions:
+                statement.transactions, template = self._extract_and_learn(pdf, layout_key)
+                if template:
+                    self.templates.put(template)
         
         # If no transactions were found, raise an error
         if not statement.transactions:
             raise ValueError("No transactions found in the PDF. The format may not be supported.")
         
-        return statement 
\ No newline at end of file
+        return statement
+    
+    def _layout_key(self, reader, pdf) -> str:
+        """Identify the issuer's layout by the PDF producer and page size"""
+        metadata = reader.metadata or {}
+        first_page = pdf.pages[0]
+        return "|".join([
+            str(metadata.get("/Producer", "")),
+            str(metadata.get("/Creator", "")),
+            f"{round(first_page.width)}x{round(first_page.height)}"
+        ])
+    
+    def _group_rows(self, words: List[Dict]) -> List[List[Dict]]:
+        """Group words into text rows, ordered top to bottom and left to right"""
+        rows = []
+        for word in sorted(words, key=lambda w: (round(w["top"]), w["x0"])):
+            if rows and abs(word["top"] - rows[-1][0]["top"]) <= self.row_tolerance:
+                rows[-1].append(word)
+            else:
+                rows.append([word])
+        return [sorted(row, key=lambda w: w["x0"]) for row in rows]
+    
+    def _is_header_row(self, row: List[Dict]) -> bool:
+        texts = [word["text"] for word in row]
+        return (
+            "POST" in texts and "INV." in texts and "AMOUNT" in texts
+            and any(text.startswith("DESCRIPTION") for text in texts)
+        )
+    
+    def _extract_and_learn(self, pdf, layout_key: str) -> Tuple[List[Transaction], Optional[LayoutTemplate]]:
+        """
+        Extract transactions from whole pages and learn the issuer's layout
+        
+        Returns:
+            Tuple of (transactions, learned template or None)
+        """
+        transactions = []
+        columns = None
+        first_top = 0
+        continuation_tops = []
+        table_bottoms = []
+        row_left = row_right = None
+        description_right = amount_left = None
+        
+        for page_number, page in enumerate(pdf.pages):
+            rows = self._group_rows(page.extract_words())
+            in_transaction_section = False
+            last_transaction_row = None
+            
+            for index, row in enumerate(rows):
+                # Transactions follow the column headers
+                if self._is_header_row(row):
+                    in_transaction_section = True
+                    header_bottom = max(word["bottom"] for word in row)
+                    if page_number == 0:
+                        first_top = header_bottom
+                    else:
+                        continuation_tops.append(header_bottom)
+                    if columns is None:
+                        x = {word["text"]: word["x0"] for word in reversed(row)}
+                        columns = {
+                            "post_date": x["POST"],
+                            "inv_date": x["INV."],
+                            "description": next(word["x0"] for word in row if word["text"].startswith("DESCRIPTION"))
+                        }
+                    continue
+                
+                if not in_transaction_section:
+                    continue
+                
+                transaction = self._parse_line(" ".join(word["text"] for word in row))
+                if not transaction:
+                    continue
+                transactions.append(transaction)
+                last_transaction_row = index
+                
+                # Amount words are the trailing words that are not part of the description
+                amount_words = [row[-1]] if row[-1]["text"] != "CR" else row[-2:]
+                description_words = row[:len(row) - len(amount_words)]
+                amount_left = min(amount_left or amount_words[0]["x0"], amount_words[0]["x0"])
+                description_right = max(description_right or 0, description_words[-1]["x1"])
+                row_left = min(row_left or row[0]["x0"], row[0]["x0"])
+                row_right = max(row_right or 0, row[-1]["x1"])
+            
+            # Leave out the page footer (the last row, when it is not a transaction)
+            if last_transaction_row is not None:
+                if last_transaction_row + 1 < len(rows):
+                    table_bottoms.append(rows[-1][0]["top"])
+                else:
+                    table_bottoms.append(page.height)
+        
+        if not transactions or columns is None:
+            return transactions, None
+        
+        # A word belongs to the right-aligned amount column once it extends
+        # past the gap between the descriptions and the amounts
+        columns["amount"] = (description_right + amount_left) / 2
+        
+        template = LayoutTemplate(
+            layout_key,
+            (
+                max(0, row_left - self.crop_margin),
+                first_top,
+                min(pdf.pages[0].width, row_right + self.crop_margin),
+                max(table_bottoms)
+            ),
+            columns,
+            min(continuation_tops) if continuation_tops else None
+        )
+        return transactions, template
+    
+    def _extract_with_template(self, pdf, template: LayoutTemplate) -> List[Transaction]:
+        """
+        Extract transactions from the template's table region only
+        
+        The region is only trusted when the page still matches the template:
+        the column headers sit right above the cached table top and no
+        transactions follow below the cached bottom. Otherwise nothing is
+        returned so that the layout is learned again from whole pages.
+        """
+        transactions = []
+        columns = template.columns
+        
+        for page_number, page in enumerate(pdf.pages):
+            chars = self._page_chars(page)
+            x0, top, x1, bottom = template.page_bbox(page_number)
+            
+            if page_number > 0 and template.continuation_top is None:
+                # First following page seen for this issuer: remember where
+                # the table starts
+                header = self._find_header(self._region_rows(chars, (0, 0, page.width, page.height)))
+                if header is None:
+                    continue
+                top = template.continuation_top = max(word["bottom"] for word in header)
+            elif not self._header_matches(chars, page, top, columns):
+                if self._find_header(self._region_rows(chars, (0, 0, page.width, page.height))):
+                    # Headers moved: rows outside the cached region would be lost
+                    return []
+                # Like whole-page extraction, a page without headers has no transactions
+                continue
+            
+            if bottom < page.height:
+                below = self._region_rows(chars, (0, bottom, page.width, page.height))
+                if any(self._parse_line(" ".join(word["text"] for word in row)) for row in below):
+                    # The table runs past the cached bottom
+                    return []
+            
+            bbox = (max(0, x0), max(0, top), min(page.width, x1), min(page.height, bottom))
+            if bbox[0] >= bbox[2] or bbox[1] >= bbox[3]:
+                continue
+            
+            for row in self._region_rows(chars, bbox):
+                # Assign each word to a column by its position
+                cells = {"post_date": [], "inv_date": [], "description": [], "amount": []}
+                for word in row:
+                    if word["x1"] > columns["amount"]:
+                        cells["amount"].append(word["text"])
+                    elif word["x0"] >= columns["description"] - self.word_tolerance:
+                        cells["description"].append(word["text"])
+                    elif word["x0"] >= columns["inv_date"] - self.word_tolerance:
+                        cells["inv_date"].append(word["text"])
+                    else:
+                        cells["post_date"].append(word["text"])
+                
+                transaction = self._parse_cells(cells)
+                if not transaction and cells["post_date"]:
+                    # Words outside their usual columns (e.g. a very long
+                    # description); parse the row as a text line instead
+                    transaction = self._parse_line(" ".join(word["text"] for word in row))
+                if transaction:
+                    transactions.append(transaction)
+        
+        return transactions
+    
+    def _find_header(self, rows: List[List[Dict]]) -> Optional[List[Dict]]:
+        """First column header row, or None"""
+        return next((row for row in rows if self._is_header_row(row)), None)
+    
+    def _header_matches(self, chars: List[Dict], page, top: float, columns: Dict[str, float]) -> bool:
+        """Check the column headers end at the cached table top, above the cached columns"""
+        strip = (0, max(0, top - self.header_strip), page.width, top + self.row_tolerance)
+        header = self._find_header(self._region_rows(chars, strip))
+        if header is None or abs(max(word["bottom"] for word in header) - top) > self.row_tolerance:
+            return False
+        
+        x = {word["text"]: word["x0"] for word in reversed(header)}
+        description_x = next(word["x0"] for word in header if word["text"].startswith("DESCRIPTION"))
+        return (
+            abs(x["POST"] - columns["post_date"]) <= self.word_tolerance
+            and abs(x["INV."] - columns["inv_date"]) <= self.word_tolerance
+            and abs(description_x - columns["description"]) <= self.word_tolerance
+        )
+    
+    def _page_chars(self, page) -> List[Dict]:
+        """
+        Characters of a page with their positions
+        
+        Reads characters straight from the pdfminer layout, skipping
+        pdfplumber's per-object processing and text layout.
+        """
+        from pdfminer.layout import LTChar, LTContainer
+        
+        chars = []
+        objects = list(page.layout)
+        while objects:
+            obj = objects.pop()
+            if isinstance(obj, LTChar):
+                # Same top-left based coordinates as pdfplumber
+                chars.append({
+                    "text": obj.get_text(),
+                    "x0": obj.x0,
+                    "x1": obj.x1,
+                    "top": page.height - obj.y1,
+                    "bottom": page.height - obj.y0
+                })
+            elif isinstance(obj, LTContainer):
+                objects.extend(obj)
+        return chars
+    
+    def _region_rows(self, chars: List[Dict], bbox: Tuple[float, float, float, float]) -> List[List[Dict]]:
+        """Words of the characters centered inside a page region, grouped into rows"""
+        x0, top, x1, bottom = bbox
+        region_chars = [
+            char for char in chars
+            if x0 <= (char["x0"] + char["x1"]) / 2 <= x1 and top <= (char["top"] + char["bottom"]) / 2 <= bottom
+        ]
+        
+        # Join characters into words, splitting on spaces and gaps
+        rows = []
+        for row_chars in self._group_rows(region_chars):
+            words = []
+            for char in row_chars:
+                if not char["text"].strip():
+                    words.append(None)
+                    continue
+                word = words[-1] if words else None
+                if word and char["x0"] - word["x1"] <= self.word_tolerance:
+                    word["text"] += char["text"]
+                    word["x1"] = char["x1"]
+                    word["bottom"] = max(word["bottom"], char["bottom"])
+                else:
+                    words.append(dict(char))
+            rows.append([word for word in words if word])
+        return rows
+    
+    def _parse_cells(self, cells: Dict[str, List[str]]) -> Optional[Transaction]:
+        """Build a transaction from column-assigned words"""
+        if len(cells["post_date"]) != 1 or len(cells["inv_date"]) != 1 or not cells["description"]:
+            return None
+        
+        amount_match = self.transaction_amount_pattern.fullmatch(" ".join(cells["amount"]))
+        if not amount_match:
+            return None
+        
+        return self._build_transaction(
+            cells["post_date"][0],
+            cells["inv_date"][0],
+            " ".join(cells["description"]),
+            amount_match.group(1)
+        )
+    
+    def _parse_line(self, line: str) -> Optional[Transaction]:
+        """Parse a transaction from a text line"""
+        # Try to match date pattern at the beginning of the line
+        date_match = self.transaction_date_pattern.match(line)
+        if not date_match:
+            return None
+            
+        # Try to match amount pattern at the end of the line
+        amount_match = self.transaction_amount_pattern.search(line)
+        if not amount_match:
+            return None
+        
+        # Extract dates
+        post_date_str, inv_date_str = date_match.groups()
+        
+        # Extract description (everything between dates and amount)
+        date_end = date_match.end()
+        amount_start = amount_match.start()
+        description = line[date_end:amount_start].strip()
+        
+        return self._build_transaction(post_date_str, inv_date_str, description, amount_match.group(1))
+    
+    def _build_transaction(
+        self,
+        post_date_str: str,
+        inv_date_str: str,
+        description: str,
+        amount_str: str
+    ) -> Optional[Transaction]:
+        """Convert extracted fields into a transaction"""
+        if not self.date_pattern.fullmatch(post_date_str) or not self.date_pattern.fullmatch(inv_date_str):
+            return None
+        
+        # Clean and convert data
+        amount = float(amount_str.replace(',', ''))
+        
+        # Parse dates
+        try:
+            post_date = datetime.strptime(post_date_str, "%d/%m/%Y")
+            inv_date = datetime.strptime(inv_date_str, "%d/%m/%Y")
+        except ValueError:
+            # Try alternate date format
+            post_date = datetime.strptime(post_date_str, "%m/%d/%Y")
+            inv_date = datetime.strptime(inv_date_str, "%m/%d/%Y")
+        
+        return Transaction(
+            post_date=post_date,
+            inv_date=inv_date,
+            description=description,
+            amount=amount
+        )
@@ -0,0 +1,107 @@
+import cProfile
+import hmac
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+class ProfilingService:
+    """Service for profiling single requests on demand"""
+
+    def __init__(self, token: str, output_dir: str, max_per_minute: int = 6):
+        # Secret an admin sends to ask for a profile
+        self.token = token
+        self.output_dir = output_dir
+        # Profiles allowed per rolling minute, so the mode cannot be used
+        # to slow the server down
+        self.max_per_minute = max_per_minute
+
+        self._lock = threading.Lock()
+        self._recent = deque()
+        # cProfile hooks the whole thread, so only one request is profiled at a time
+        self._active = False
+
+    @classmethod
+    def from_env(cls) -> Optional["ProfilingService"]:
+        """Create the service from the environment, or None if profiling is off"""
+        token = os.environ.get("PROFILING_TOKEN")
+        if not token:
+            return None
+        return cls(
+            token,
+            os.environ.get("PROFILING_DIR", "./profiles"),
+            int(os.environ.get("PROFILING_MAX_PER_MINUTE", "6"))
+        )
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """Check an admin token"""
+        # compare_digest only accepts ASCII strings, so compare the UTF-8 bytes
+        return bool(token) and hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+
+    def acquire(self) -> bool:
+        """
+        Reserve the profiling slot for one request
+
+        Returns:
+            False if another request is being profiled or the rate limit is
+            reached; otherwise True, and profile() releases the slot
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._active:
+                return False
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.max_per_minute:
+                return False
+            self._recent.append(now)
+            self._active = True
+            return True
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[str]:
+        """
+        Profile the enclosed code and save the stats
+
+        Must follow a successful acquire(); the slot is released on exit.
+        The profiler records everything running on the thread, so in an
+        async request the profile also includes other coroutines the event
+        loop runs while the request is awaiting.
+
+        Args:
+            name: Short label included in the file name, e.g. the endpoint
+
+        Yields:
+            ID of the profile, usable with path_for()
+        """
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield profile_id
+            finally:
+                profiler.disable()
+                os.makedirs(self.output_dir, exist_ok=True)
+                profiler.dump_stats(os.path.join(self.output_dir, f"{profile_id}.prof"))
+        finally:
+            with self._lock:
+                self._active = False
+
+    def list_profiles(self) -> List[str]:
+        """IDs of saved profiles, newest first"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(
+            (name[:-len(".prof")] for name in os.listdir(self.output_dir) if name.endswith(".prof")),
+            reverse=True
+        )
+
+    def path_for(self, profile_id: str) -> Optional[str]:
+        """Path of a saved profile, or None if there is no such profile"""
+        if profile_id not in self.list_profiles():
+            return None
+        return os.path.join(self.output_dir, f"{profile_id}.prof")
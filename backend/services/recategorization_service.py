@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+import uuid
+from itertools import islice
+from typing import Dict, Optional
+
+from database.database import Database
+from database.sqlite_store import SQLiteStore
+from services.category_service import CategoryService
+
+class RecategorizationService:
+    """
+    Service for re-categorizing stored transactions in the background
+
+    With a shared store (several workers), the job holds a lease in the
+    store so only one worker runs a pass at a time, and its status is kept
+    there so every worker reports the same progress.
+    """
+
+    # Name of the job's lease in the shared store
+    JOB_NAME = "recategorization"
+
+    def __init__(
+        self,
+        category_service: CategoryService,
+        batch_size: int = 500,
+        batch_delay: float = 0.05,
+        lease_seconds: float = 60
+    ):
+        self.category_service = category_service
+
+        # Transactions categorized per batch, and pause between batches so
+        # the job does not starve request handling
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        # How long a worker keeps the shared lease without renewing it; a
+        # worker that dies mid-pass loses the job after this long
+        self.lease_seconds = lease_seconds
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._rerun = False
+        # Store of the database the current job runs against, if shared
+        self._store: Optional[SQLiteStore] = None
+        self._instance_id = uuid.uuid4().hex[:8]
+        self._status = {
+            "state": "idle",
+            "total": 0,
+            "processed": 0,
+            "updated": 0,
+            "started_at": None,
+            "finished_at": None
+        }
+
+    @property
+    def _owner(self) -> str:
+        """Lease owner ID, distinct per worker process"""
+        return f"{os.getpid()}-{self._instance_id}"
+
+    def start(self, db: Database) -> bool:
+        """
+        Start a re-categorization job
+
+        If a job is already running, in this or another worker, another pass
+        is scheduled to run after it so that a newer model is applied to
+        every transaction.
+
+        Args:
+            db: Database whose transactions should be re-categorized
+
+        Returns:
+            True if a new job was started, False if one was already running
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._rerun = True
+                return False
+
+            store = db.store
+            if store and not store.acquire_job(self.JOB_NAME, self._owner, self.lease_seconds):
+                return False
+            self._store = store
+
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(db,),
+                name="recategorization",
+                daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def status(self, db: Optional[Database] = None) -> Dict:
+        """
+        Get the progress of the current or last job
+
+        Args:
+            db: Database the job runs against; with a shared store, the
+                status recorded by whichever worker runs the job is returned
+        """
+        with self._lock:
+            status = dict(self._status)
+
+        store = db.store if db else None
+        shared = store.job_status(self.JOB_NAME) if store else None
+        if shared is None:
+            return status
+
+        status, active = shared
+        if status.get("state") == "running" and not active:
+            # The worker running the pass stopped without finishing it
+            status["state"] = "interrupted"
+        return status
+
+    def _run(self, db: Database) -> None:
+        """Run passes until no further pass was requested"""
+        while True:
+            try:
+                self._recategorize(db)
+            except Exception as e:
+                print(f"Error re-categorizing transactions: {e}")
+                self._update_status(state="failed", finished_at=time.time())
+
+            with self._lock:
+                if self._rerun:
+                    self._rerun = False
+                    continue
+                # Other workers may have asked for another pass
+                if self._store and self._store.finish_job(self.JOB_NAME, self._owner, self.lease_seconds):
+                    continue
+                self._thread = None
+                return
+
+    def _recategorize(self, db: Database) -> None:
+        """Stream stored transactions through the categorizer in batches"""
+        # Work from one snapshot; transactions added later are categorized on upload
+        snapshot = db.snapshot()
+        transactions = iter(snapshot.transactions.values())
+
+        # Every stored row is visited, including the user-categorized ones
+        # that are skipped, so progress ends at the total
+        self._update_status(
+            state="running",
+            total=len(snapshot.transactions),
+            processed=0,
+            updated=0,
+            started_at=time.time(),
+            finished_at=None
+        )
+
+        processed = 0
+        updated = 0
+        while True:
+            batch = list(islice(transactions, self.batch_size))
+            if not batch:
+                break
+
+            pending = [transaction for transaction in batch if not transaction.user_categorized]
+            if pending:
+                categories = self.category_service.categorize_batch([t.description for t in pending])
+                changes = {
+                    transaction.id: category
+                    for transaction, category in zip(pending, categories)
+                    if transaction.category != category
+                }
+                if changes:
+                    # Each write copies only the statements the batch touches.
+                    # Rows the user categorized meanwhile are skipped by the database
+                    updated += db.update_transaction_categories(changes)
+
+            processed += len(batch)
+            if not self._update_status(processed=processed, updated=updated):
+                # Another worker took over the lease; it runs its own pass
+                return
+
+            if self.batch_delay:
+                time.sleep(self.batch_delay)
+
+        self._update_status(state="completed", finished_at=time.time())
+
+    def _update_status(self, **fields) -> bool:
+        """
+        Record progress, renewing the shared lease if there is one
+
+        Returns:
+            False if the shared lease was lost
+        """
+        with self._lock:
+            self._status.update(fields)
+            status = dict(self._status)
+            store = self._store
+        if store:
+            return store.update_job(self.JOB_NAME, self._owner, self.lease_seconds, status)
+        return True
@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import datetime
+
+from database.database import Database
+from models.models import Statement, Transaction
+
+# Concurrency stress test: readers run against the snapshot database while
+# writers keep uploading statements and re-categorizing transactions.
+
+NUM_WRITES = 100
+TRANSACTIONS_PER_STATEMENT = 20
+NUM_READERS = 4
+
+db = Database()
+stop = threading.Event()
+reads = [0] * NUM_READERS
+errors = []
+
+def make_statement(index):
+    transactions = [
+        Transaction(
+            post_date=datetime(2025, 1, 1),
+            inv_date=datetime(2025, 1, 1),
+            description=f"MERCHANT {index}-{n}",
+            amount=100.0 + n
+        )
+        for n in range(TRANSACTIONS_PER_STATEMENT)
+    ]
+    return Statement(filename=f"Statement {index}.pdf", month=1, year=2025, transactions=transactions)
+
+def writer():
+    for index in range(NUM_WRITES):
+        statement = db.snapshot().statements.get(f"s{index - 1}")
+        db.add_statement(make_statement(index).model_copy(update={"id": f"s{index}"}))
+        # Flip every transaction of the previous statement to a single category
+        if statement:
+            db.update_transaction_categories({t.id: f"Batch {index}" for t in statement.transactions})
+    stop.set()
+
+def reader(slot):
+    while not stop.is_set():
+        snapshot = db.snapshot()
+        # Every transaction of every statement must be indexed in the same version
+        for statement in snapshot.statements.values():
+            categories = {t.category for t in statement.transactions}
+            if len(categories) != 1:
+                errors.append(f"Torn statement {statement.id}: {categories}")
+            for transaction in statement.transactions:
+                if snapshot.transactions.get(transaction.id) is not transaction:
+                    errors.append(f"Inconsistent transaction {transaction.id} in {statement.id}")
+        db.get_all_statements()
+        reads[slot] += 1
+
+print("Testing snapshot database under concurrent reads and writes")
+print("=" * 80)
+
+threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(NUM_READERS)]
+start = time.perf_counter()
+for thread in threads:
+    thread.start()
+writer_thread = threading.Thread(target=writer)
+writer_thread.start()
+writer_thread.join()
+for thread in threads:
+    thread.join()
+elapsed = time.perf_counter() - start
+
+snapshot = db.snapshot()
+print(f"Writes: {NUM_WRITES} statements + {NUM_WRITES - 1} bulk updates in {elapsed:.2f}s")
+print(f"Final version: {snapshot.version}")
+print(f"Statements: {len(snapshot.statements)}, transactions: {len(snapshot.transactions)}")
+print(f"Consistent reads: {sum(reads)} ({sum(reads) / elapsed:.1f} reads/s across {NUM_READERS} readers)")
+
+if errors:
+    print(f"❌ FAILED: {len(errors)} inconsistent reads, first: {errors[0]}")
+else:
+    print("✅ All reads saw a consistent statement set")
+
+# Cost of one write: a single category change only copies the statement it
+# touches, so it should not grow with the number of stored transactions
+print()
+print(f"{'Transactions':>12} {'Single update':>14} {'Upload':>8}")
+write_times = []
+for num_statements in (10, 100):
+    db = Database()
+    for index in range(num_statements):
+        db.add_statement(make_statement(index).model_copy(update={"id": f"s{index}"}))
+    transaction_id = db.get_statement("s0").transactions[0].id
+
+    start = time.perf_counter()
+    for n in range(100):
+        db.update_transaction_category(transaction_id, f"Category {n}")
+    update_time = (time.perf_counter() - start) / 100
+
+    start = time.perf_counter()
+    for n in range(20):
+        db.add_statement(make_statement(num_statements + n))
+    upload_time = (time.perf_counter() - start) / 20
+
+    write_times.append(update_time)
+    print(f"{num_statements * TRANSACTIONS_PER_STATEMENT:>12} {update_time * 1000:>12.2f}ms {upload_time * 1000:>6.2f}ms")
+
+if write_times[1] > write_times[0] * 3:
+    print("❌ FAILED: single updates get slower as the database grows")
+else:
+    print("✅ Write cost does not grow with the database size")
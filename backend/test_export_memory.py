@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+from datetime import date, datetime
+
+from database.database import Database
+from models.models import Statement, Transaction
+from services.export_service import ExportService
+
+# Memory use of streaming exports: peak allocation while draining each
+# format should stay flat regardless of how many rows are exported
+
+NUM_STATEMENTS = 24
+TRANSACTIONS_PER_STATEMENT = 2000
+
+db = Database()
+for index in range(NUM_STATEMENTS):
+    db.add_statement(Statement(
+        filename=f"Statement {index}.pdf",
+        month=index % 12 + 1,
+        year=2025,
+        transactions=[
+            Transaction(
+                post_date=datetime(2025, index % 12 + 1, n % 28 + 1),
+                inv_date=datetime(2025, index % 12 + 1, n % 28 + 1),
+                description=f"MERCHANT {n}, COLOMBO {n % 15:02d}",
+                amount=n * 1.25,
+                category="Grocery" if n % 3 else "Fuel"
+            )
+            for n in range(TRANSACTIONS_PER_STATEMENT)
+        ]
+    ))
+
+# Small batches so even the one-month export spans several chunks
+export_service = ExportService(batch_size=1000)
+total_rows = NUM_STATEMENTS * TRANSACTIONS_PER_STATEMENT
+
+# Keep one-time imports (pyarrow for Parquet) out of the measurements
+for format in export_service.MEDIA_TYPES:
+    for _ in export_service.stream(iter(()), format):
+        pass
+
+def measure(format, **filters):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    output_bytes = 0
+    rows = export_service.iter_transactions(db.snapshot(), **filters)
+    for chunk in export_service.stream(rows, format):
+        output_bytes += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output_bytes, peak, elapsed
+
+print(f"Testing streaming export of {total_rows} transactions")
+print("=" * 80)
+print(f"{'Format':<10} {'Rows':>8} {'Output':>10} {'Peak alloc':>11} {'Time':>7}")
+
+failures = []
+for format in export_service.MEDIA_TYPES:
+    # One month of transactions vs. everything: peak memory should not grow with row count
+    results = [
+        ("1 month", measure(format, start_date=date(2025, 1, 1), end_date=date(2025, 1, 31))),
+        ("all", measure(format))
+    ]
+    for label, (output_bytes, peak, elapsed) in results:
+        print(f"{format:<10} {label:>8} {output_bytes / 1e6:>8.1f}MB {peak / 1e6:>9.1f}MB {elapsed:>6.2f}s")
+
+    month_peak, all_peak = results[0][1][1], results[1][1][1]
+    if all_peak > month_peak * 1.5:
+        failures.append(f"{format} export memory grows with the number of rows")
+
+if failures:
+    for failure in failures:
+        print(f"❌ FAILED: {failure}")
+else:
+    print("✅ Export memory test complete")
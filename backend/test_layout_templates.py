@@ -0,0 +1,135 @@
+import os
+import tempfile
+import time
+
+from services.pdf_service import PDFService
+
+# Layout templates: the first statement of an issuer is read from whole
+# pages and its table layout learned; later ones only read the cropped
+# table region. Uses a generated two-page statement in the usual format.
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+FONT_SIZE = 9
+# Helvetica glyph widths (1/1000 em) for right-aligning amounts
+GLYPH_WIDTHS = {",": 278, ".": 278, " ": 278, "C": 722, "R": 722}
+
+def text_width(text):
+    return sum(GLYPH_WIDTHS.get(char, 556) for char in text) * FONT_SIZE / 1000
+
+def escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_statement(path, transactions, rows_per_page, first_header_y=700):
+    """Write a minimal PDF statement (no PDF library needed)"""
+    pages = []
+    for start in range(0, len(transactions), rows_per_page):
+        first = start == 0
+        lines = []
+        if first:
+            lines += [(50, 800, "Credit Card Statement"), (50, 780, "Statement Date 28/02/2025")]
+            lines += [(50, 760, "Minimum Payment Due 5,000.00"), (50, 740, "Total Outstanding 98,765.43")]
+        header_y = first_header_y if first else 800
+        lines += [(50, header_y, "POST DATE"), (110, header_y, "INV. DATE"),
+                  (170, header_y, "DESCRIPTION/REFERENCE NUMBER"), (480, header_y, "AMOUNT")]
+        y = header_y - 18
+        for post_date, inv_date, description, amount in transactions[start:start + rows_per_page]:
+            lines += [(50, y, post_date), (110, y, inv_date), (170, y, description),
+                      (530 - text_width(amount), y, amount)]
+            y -= 14
+        page_number = start // rows_per_page + 1
+        lines.append((270, 30, f"Page {page_number} of {-(-len(transactions) // rows_per_page)}"))
+        pages.append("BT /F1 9 Tf " + " ".join(
+            f"1 0 0 1 {x:.2f} {y} Tm ({escape(text)}) Tj" for x, y, text in lines
+        ) + " ET")
+
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for content in pages:
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(output)
+
+merchants = ["UMANDAWA GREEN HUT, COLOMBO 03", "ASIRI LAB - KADAWATHA, KADAWATHA",
+             "Pageant Hall Events, COLOMBO 07", "SPICE TRAIL RESTAURA, KELANIYA"]
+transactions = [
+    (f"{day % 28 + 1:02d}/02/2025", f"{day % 28 + 1:02d}/02/2025", merchants[day % len(merchants)],
+     f"{(day * 7919) % 150000 + 25.5:,.2f}" + (" CR" if day % 17 == 0 else ""))
+    for day in range(90)
+]
+
+print("Testing layout template extraction")
+print("=" * 80)
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    pdf_path = os.path.join(temp_dir, "February 2025.pdf")
+    write_statement(pdf_path, transactions, rows_per_page=45)
+    service = PDFService(os.path.join(temp_dir, "layout_templates.json"))
+    service.warm_up()
+
+    # Previous approach for reference: whole-page text of every page
+    import pdfplumber
+    start = time.perf_counter()
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            page.extract_text()
+    text_time = time.perf_counter() - start
+
+    # First statement of this issuer: whole pages, learns the template
+    start = time.perf_counter()
+    learned = service.process_pdf(pdf_path)
+    learn_time = time.perf_counter() - start
+
+    template = next(iter(service.templates.templates.values()), None)
+    if template:
+        print(f"Template: bbox={[round(v, 1) for v in template.bbox]} "
+              f"continuation_top={template.continuation_top} "
+              f"columns={ {name: round(x, 1) for name, x in template.columns.items()} }")
+
+    # Later statements: cropped table region with column assignment
+    runs = 5
+    start = time.perf_counter()
+    for _ in range(runs):
+        cached = service.process_pdf(pdf_path)
+    cached_time = (time.perf_counter() - start) / runs
+
+    print(f"Whole-page text:       {text_time * 1000:.1f}ms")
+    print(f"Whole-page extraction: {learn_time * 1000:.1f}ms (learns template)")
+    print(f"Template extraction:   {cached_time * 1000:.1f}ms")
+
+    expected = [(t[2], float(t[3].replace(",", "").replace(" CR", ""))) for t in transactions]
+    for name, statement in (("whole-page", learned), ("template", cached)):
+        extracted = [(t.description, t.amount) for t in statement.transactions]
+        if extracted != expected:
+            print(f"❌ FAILED: {name} extraction found {len(extracted)} of {len(expected)} transactions")
+
+    if template and any("Page" in t.description for t in cached.transactions):
+        print("✅ Descriptions containing 'Page' are kept")
+
+    # Same issuer with the first page's table shifted up: the cached region
+    # no longer covers the first row, so the template must not be trusted
+    shifted_path = os.path.join(temp_dir, "March 2025.pdf")
+    write_statement(shifted_path, transactions, rows_per_page=45, first_header_y=720)
+    shifted = service.process_pdf(shifted_path)
+    extracted = [(t.description, t.amount) for t in shifted.transactions]
+    relearned = next(iter(service.templates.templates.values()), None)
+    if extracted != expected:
+        print(f"❌ FAILED: shifted layout extraction found {len(extracted)} of {len(expected)} transactions")
+    elif not template or not relearned or relearned.bbox[1] >= template.bbox[1]:
+        print("❌ FAILED: template was not learned again for the shifted layout")
+    else:
+        print(f"✅ Shifted layout found all {len(extracted)} transactions and re-learned the template")
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+import sklearn  # keep the one-off library import out of the timings
+
+from services.category_service import CategoryService
+
+# Startup time of CategoryService with and without a fitted model snapshot
+
+corpus_sizes = [1000, 10000, 50000]
+merchants = ["GREEN HUT", "MAGIC CORN", "ASIRI LAB", "SPICE TRAIL", "MINERAL SPRING", "NIPPON VILLA"]
+towns = ["COLOMBO", "KADAWATHA", "KELANIYA", "WALIPENNA", "HIKKADUWA", "MAHARAGAMA"]
+labels = ["Dining/Restaurants", "Healthcare", "Travel", "Grocery", "Other"]
+
+print("Testing model snapshot cold start")
+print("=" * 80)
+print(f"{'Corpus':>8} {'Retrain':>10} {'Snapshot':>10} {'Speedup':>8}")
+
+failures = []
+random.seed(0)
+with tempfile.TemporaryDirectory() as temp_dir:
+    for size in corpus_sizes:
+        model_path = os.path.join(temp_dir, f"model_{size}.json")
+        with open(model_path, "w") as f:
+            json.dump({
+                "training_data": [
+                    f"{random.choice(merchants)} {n % 97}, {random.choice(towns)} {n % 13:02d}"
+                    for n in range(size)
+                ],
+                "training_labels": [random.choice(labels) for _ in range(size)]
+            }, f)
+
+        # No snapshot yet: fits the pipeline and writes the snapshot
+        start = time.perf_counter()
+        retrained = CategoryService(model_path)
+        retrained.warm_up()
+        retrain_time = time.perf_counter() - start
+
+        # Snapshot present and current: loads the fitted pipeline
+        start = time.perf_counter()
+        loaded = CategoryService(model_path)
+        loaded.warm_up()
+        load_time = time.perf_counter() - start
+
+        print(f"{size:>8} {retrain_time:>9.3f}s {load_time:>9.3f}s {retrain_time / load_time:>7.1f}x")
+
+        sample = ["GREEN HUT 12, COLOMBO 03", "XYZ 1, NOWHERE"]
+        if list(retrained.model.predict(sample)) != list(loaded.model.predict(sample)):
+            failures.append(f"snapshot predictions differ for corpus of {size}")
+
+        # Changing the training data makes the snapshot stale
+        loaded.training_data.append("NEW MERCHANT")
+        loaded.training_labels.append("Other")
+        if loaded.load_model_snapshot():
+            failures.append(f"stale snapshot was accepted for corpus of {size}")
+
+# Training on the request thread and the re-categorization thread at once
+# must still leave one complete snapshot behind
+with tempfile.TemporaryDirectory() as temp_dir:
+    model_path = os.path.join(temp_dir, "category_model.json")
+    service = CategoryService(model_path)
+    for n in range(2000):
+        service.training_data.append(f"{random.choice(merchants)} {n}, {random.choice(towns)}")
+        service.training_labels.append(random.choice(labels))
+    service.save_training_data()
+
+    errors = []
+    def train():
+        try:
+            for _ in range(3):
+                service.train_model()
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=train) for _ in range(6)]
+    # Save errors are logged rather than raised
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    errors.extend(line for line in log.getvalue().splitlines() if line.startswith("Error"))
+
+    leftovers = [name for name in os.listdir(temp_dir) if name.endswith(".tmp")]
+    if errors or leftovers or not CategoryService(model_path).load_model_snapshot():
+        failures.append(f"concurrent training left a broken snapshot (errors: {errors}, temp files: {leftovers})")
+    else:
+        print("✅ Concurrent training leaves a loadable snapshot")
+
+if failures:
+    for failure in failures:
+        print(f"❌ FAILED: {failure}")
+else:
+    print("✅ Snapshot timings complete")
@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from database.database import Database
+from database.sqlite_store import SQLiteStore
+from models.models import Statement, Transaction
+from services.category_service import CategoryService
+
+# Several worker processes sharing one SQLite store: every worker must see
+# the others' uploads and corrections. Writes and reads are timed in separate
+# phases and reported as aggregate throughput across workers. Writes are
+# serialized by the store; reads should scale with workers, which is only
+# checked when there are enough CPUs to show it
+
+STATEMENTS_PER_WORKER = 50
+TRANSACTIONS_PER_STATEMENT = 20
+READS_PER_WORKER = 1000
+CORRECTIONS_PER_WORKER = 15
+
+def make_statement(worker, index):
+    return Statement(
+        id=f"w{worker}-s{index}",
+        filename=f"Statement {index}.pdf",
+        month=1,
+        year=2025,
+        transactions=[
+            Transaction(
+                id=f"w{worker}-s{index}-t{n}",
+                post_date=datetime(2025, 1, 1),
+                inv_date=datetime(2025, 1, 1),
+                description=f"MERCHANT {n}",
+                amount=100.0 + n
+            )
+            for n in range(TRANSACTIONS_PER_STATEMENT)
+        ]
+    )
+
+def worker(db_path, worker_id, num_workers, barrier, results):
+    db = Database(SQLiteStore(db_path))
+
+    # Write phase: uploads and corrections
+    barrier.wait()
+    write_start = time.monotonic()
+    for index in range(STATEMENTS_PER_WORKER):
+        db.add_statement(make_statement(worker_id, index))
+        db.update_transaction_category(f"w{worker_id}-s{index}-t0", "Grocery")
+    write_end = time.monotonic()
+
+    # Wait for all workers, then check this worker sees every write
+    barrier.wait()
+    snapshot = db.snapshot()
+    missing = [
+        f"w{other}-s{index}"
+        for other in range(num_workers)
+        for index in range(STATEMENTS_PER_WORKER)
+        if f"w{other}-s{index}" not in snapshot.statements
+    ]
+    wrong_category = [
+        transaction_id for transaction_id, transaction in snapshot.transactions.items()
+        if transaction_id.endswith("-t0") and transaction.category != "Grocery"
+    ]
+
+    # Read phase: the statement list, as served by GET /statements
+    barrier.wait()
+    read_start = time.monotonic()
+    for _ in range(READS_PER_WORKER):
+        db.get_all_statements()
+    read_end = time.monotonic()
+
+    results.put((worker_id, (write_start, write_end), (read_start, read_end), missing, wrong_category))
+
+def run(num_workers):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "statements.db")
+        SQLiteStore(db_path)
+
+        barrier = multiprocessing.Barrier(num_workers)
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(db_path, n, num_workers, barrier, results))
+            for n in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    # Aggregate throughput: all workers' operations over the phase's wall time
+    def phase_rate(operations, phase):
+        start = min(outcome[phase][0] for outcome in outcomes)
+        end = max(outcome[phase][1] for outcome in outcomes)
+        return num_workers * operations / (end - start)
+
+    write_rate = phase_rate(STATEMENTS_PER_WORKER * 2, 1)
+    read_rate = phase_rate(READS_PER_WORKER, 2)
+    print(f"{num_workers:>7} {write_rate:>10.1f} {read_rate:>10.1f}")
+
+    for worker_id, _, _, missing, wrong_category in outcomes:
+        if missing:
+            print(f"❌ FAILED: worker {worker_id} is missing {len(missing)} statements")
+        if wrong_category:
+            print(f"❌ FAILED: worker {worker_id} sees {len(wrong_category)} stale categories")
+    return read_rate
+
+def check_model_propagation():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = os.path.join(temp_dir, "category_model.json")
+        first = CategoryService(model_path)
+        second = CategoryService(model_path)
+
+        # Corrections made in one worker...
+        for n in range(12):
+            first.learn(f"ZEPHYR VALLEY {n}, NUWARA ELIYA", "Travel")
+
+        # ...are used by the other worker on its next categorization
+        category = second.categorize("ZEPHYR VALLEY 99, NUWARA ELIYA")
+        if category != "Travel" or len(second.training_data) != 12:
+            print(f"❌ FAILED: model update did not propagate (got {category})")
+        else:
+            print("✅ Model updates propagate between workers")
+
+def learner(model_path, worker_id, barrier):
+    service = CategoryService(model_path)
+    barrier.wait()
+    for n in range(CORRECTIONS_PER_WORKER):
+        service.learn(f"ZEPHYR VALLEY {worker_id}-{n}, NUWARA ELIYA", "Travel")
+
+def check_concurrent_learning(num_workers=4):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = os.path.join(temp_dir, "category_model.json")
+        barrier = multiprocessing.Barrier(num_workers)
+        processes = [
+            multiprocessing.Process(target=learner, args=(model_path, n, barrier))
+            for n in range(num_workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        # Every worker's corrections must survive the others' writes
+        saved = len(CategoryService(model_path).training_data)
+        expected = num_workers * CORRECTIONS_PER_WORKER
+        if saved != expected:
+            print(f"❌ FAILED: {expected - saved} of {expected} concurrent corrections were lost")
+        else:
+            print(f"✅ All {expected} concurrent corrections from {num_workers} workers were kept")
+
+def check_reads_during_write():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "statements.db")
+        db = Database(SQLiteStore(db_path))
+
+        # Another worker commits a statement, then holds the store's write lock
+        other = Database(SQLiteStore(db_path))
+        other.add_statement(make_statement(1, 0))
+        other_store = SQLiteStore(db_path)
+        held = threading.Event()
+        release = threading.Event()
+
+        def hold_write_lock():
+            with other_store.write():
+                held.set()
+                release.wait()
+
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        held.wait()
+
+        # A local writer waits for the store's lock while holding the database's
+        writer = threading.Thread(target=db.add_statement, args=(make_statement(0, 0),))
+        writer.start()
+        time.sleep(0.2)
+
+        # Reads must still catch up without waiting for the writer
+        start = time.perf_counter()
+        seen = "w1-s0" in db.snapshot().statements
+        read_time = time.perf_counter() - start
+
+        release.set()
+        holder.join()
+        writer.join()
+
+        if not seen or read_time > 1:
+            print(f"❌ FAILED: read during a blocked write took {read_time:.2f}s (caught up: {seen})")
+        elif "w0-s0" not in db.snapshot().statements or "w1-s0" not in db.snapshot().statements:
+            print("❌ FAILED: blocked write or catch-up was lost")
+        else:
+            print(f"✅ Reads catch up without waiting for writers ({read_time * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    print("Testing shared SQLite store across worker processes")
+    print("=" * 80)
+    print(f"{'Workers':>7} {'Writes/s':>10} {'Reads/s':>10}")
+    read_rates = {num_workers: run(num_workers) for num_workers in (1, 2, 4)}
+
+    cpus = os.cpu_count() or 1
+    if cpus < 4:
+        print(f"Note: only {cpus} CPU(s), so read scaling across 4 workers cannot be shown here")
+    elif read_rates[4] < read_rates[1] * 2:
+        print(f"❌ FAILED: reads do not scale with workers ({read_rates[1]:.0f}/s -> {read_rates[4]:.0f}/s)")
+    else:
+        print(f"✅ Reads scale with workers ({read_rates[1]:.0f}/s -> {read_rates[4]:.0f}/s)")
+    check_model_propagation()
+    check_concurrent_learning()
+    check_reads_during_write()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from database.database import Database
+from database.sqlite_store import SQLiteStore
+from models.models import Statement, Transaction
+from services.category_service import CategoryService
+from services.recategorization_service import RecategorizationService
+
+# Background re-categorization: stale automatic categories are rewritten in
+# batches, user choices are kept, and a start() during a run schedules a
+# second pass, also when it comes from another worker sharing the store.
+# Corrections only trigger a pass once they retrain the model
+
+NUM_STATEMENTS = 4
+TRANSACTIONS_PER_STATEMENT = 50
+
+db = Database()
+for index in range(NUM_STATEMENTS):
+    db.add_statement(Statement(
+        id=f"s{index}",
+        filename=f"Statement {index}.pdf",
+        month=index + 1,
+        year=2025,
+        transactions=[
+            Transaction(
+                id=f"s{index}-t{n}",
+                post_date=datetime(2025, index + 1, 1),
+                inv_date=datetime(2025, index + 1, 1),
+                description="CARGILLS FOOD CITY, COLOMBO 03" if n % 2 else "LANKA IOC, KELANIYA",
+                amount=100.0 + n,
+                category="Other"
+            )
+            for n in range(TRANSACTIONS_PER_STATEMENT)
+        ]
+    ))
+
+# The user's own choice must survive re-categorization
+db.update_transaction_category("s0-t1", "Gifts/Donations")
+
+print("Testing background re-categorization")
+print("=" * 80)
+
+failures = []
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    # Rule-based categorization only: no training data in the temporary model
+    category_service = CategoryService(os.path.join(temp_dir, "category_model.json"))
+    service = RecategorizationService(category_service, batch_size=10, batch_delay=0.02)
+
+    if not service.start(db):
+        failures.append("first start() did not start a job")
+    thread = service._thread
+
+    # Wait until the first pass has processed some rows, then reset an
+    # already processed row and ask for another pass
+    while service.status()["processed"] < 50:
+        time.sleep(0.005)
+    db.update_transaction_categories({"s0-t2": "Other"})
+    if service.start(db):
+        failures.append("second start() started a parallel job")
+
+    progress = []
+    while thread.is_alive():
+        status = service.status()
+        progress.append((status["state"], status["processed"]))
+        time.sleep(0.01)
+    thread.join()
+
+status = service.status()
+print(f"Status: {status['state']}, {status['processed']}/{status['total']} processed, {status['updated']} updated")
+print(f"Progress samples: {len(progress)}, first {progress[:3]}, last {progress[-3:]}")
+
+# User-categorized rows are visited and skipped, so they count as processed
+expected_total = NUM_STATEMENTS * TRANSACTIONS_PER_STATEMENT
+if status["state"] != "completed" or status["processed"] != status["total"] or status["total"] != expected_total:
+    failures.append(f"status did not end completed with all {expected_total} rows processed")
+if not any(state == "running" and 0 < processed < expected_total for state, processed in progress):
+    failures.append("status never reported partial progress")
+
+snapshot = db.snapshot()
+if snapshot.transactions["s0-t1"].category != "Gifts/Donations":
+    failures.append("user-categorized transaction was overwritten")
+stale = [
+    transaction.id for transaction in snapshot.transactions.values()
+    if not transaction.user_categorized and transaction.category not in ("Grocery", "Fuel")
+]
+if stale:
+    failures.append(f"{len(stale)} transactions kept a stale category, e.g. {stale[0]}")
+# Reset during the first pass after it was processed: only the second pass fixes it
+if snapshot.transactions["s0-t2"].category != "Fuel":
+    failures.append("second start() did not schedule another pass")
+
+# Two workers sharing a store: one runs the job, the other reports its
+# progress and can only schedule another pass
+with tempfile.TemporaryDirectory() as temp_dir:
+    db_path = os.path.join(temp_dir, "statements.db")
+    first_db = Database(SQLiteStore(db_path))
+    for statement in db.snapshot().statements.values():
+        first_db.add_statement(statement.model_copy(update={
+            "transactions": [t.model_copy(update={"category": "Other", "user_categorized": False})
+                             for t in statement.transactions]
+        }))
+    second_db = Database(SQLiteStore(db_path))
+
+    category_service = CategoryService(os.path.join(temp_dir, "category_model.json"))
+    first = RecategorizationService(category_service, batch_size=10, batch_delay=0.02)
+    second = RecategorizationService(category_service, batch_size=10, batch_delay=0.02)
+
+    if not first.start(first_db):
+        failures.append("first worker did not start the shared job")
+    thread = first._thread
+    while first.status(first_db)["processed"] < 50:
+        time.sleep(0.005)
+
+    other_status = second.status(second_db)
+    print(f"Other worker sees: {other_status['state']}, {other_status['processed']}/{other_status['total']}")
+    if other_status["state"] != "running" or other_status["processed"] < 50:
+        failures.append("other worker does not report the running job")
+
+    second_db.update_transaction_categories({"s0-t2": "Other"})
+    if second.start(second_db):
+        failures.append("other worker started a parallel pass")
+    thread.join()
+
+    final_status = second.status(second_db)
+    if final_status["state"] != "completed" or final_status["processed"] != final_status["total"]:
+        failures.append(f"other worker reports {final_status['state']} after the job finished")
+    if second_db.snapshot().transactions["s0-t2"].category != "Fuel":
+        failures.append("start() in another worker did not schedule another pass")
+    if not second.start(second_db):
+        failures.append("job could not be started again after it finished")
+    second._thread.join()
+
+# A correction only needs a pass when it retrained the model: below ten
+# samples learn() keeps the rule-based categories
+with tempfile.TemporaryDirectory() as temp_dir:
+    category_service = CategoryService(os.path.join(temp_dir, "category_model.json"))
+    retrained = [category_service.learn(f"ZEPHYR VALLEY {n}, NUWARA ELIYA", "Travel") for n in range(10)]
+    if any(retrained[:9]) or not retrained[9]:
+        failures.append(f"learn() reported model changes {retrained}, expected only the tenth")
+
+if failures:
+    for failure in failures:
+        print(f"❌ FAILED: {failure}")
+else:
+    print("✅ Re-categorization keeps user choices, updates stale rows and reruns on request")
@@ -0,0 +1,105 @@
+import io
+import os
+import pstats
+import shutil
+import tempfile
+from datetime import datetime
+
+# On-demand request profiling: only requests carrying the admin token are
+# profiled, at most PROFILING_MAX_PER_MINUTE of them
+
+profile_dir = tempfile.mkdtemp()
+os.environ["PROFILING_TOKEN"] = "test-admin-token"
+os.environ["PROFILING_DIR"] = profile_dir
+os.environ["PROFILING_MAX_PER_MINUTE"] = "2"
+
+from fastapi.testclient import TestClient
+
+import main
+from database.database import get_db
+from models.models import Statement, Transaction
+from services.profiling_service import ProfilingService
+
+statement = Statement(
+    filename="February 2025.pdf",
+    month=2,
+    year=2025,
+    transactions=[
+        Transaction(post_date=datetime(2025, 2, 1), inv_date=datetime(2025, 2, 1),
+                    description="CARGILLS FOOD CITY", amount=2500.0, category="Grocery")
+    ]
+)
+get_db().add_statement(statement)
+client = TestClient(main.app)
+
+print("Testing on-demand request profiling")
+print("=" * 80)
+
+failures = []
+
+response = client.get("/analytics/summary")
+if "X-Profile-Id" in response.headers:
+    failures.append("request without token was profiled")
+
+response = client.get("/analytics/summary", headers={"X-Profile": "wrong"})
+if response.status_code != 403:
+    failures.append(f"wrong token returned {response.status_code}")
+
+response = client.get("/analytics/summary", headers={"X-Profile": "test-admin-token"})
+profile_id = response.headers.get("X-Profile-Id")
+print(f"Header-triggered profile: {profile_id}")
+if response.status_code != 200 or not profile_id:
+    failures.append("header did not trigger a profile")
+
+response = client.get("/analytics/compare", params={"statement_ids": statement.id, "profile": "test-admin-token"})
+print(f"Query-triggered profile: {response.headers.get('X-Profile-Id')}")
+if not response.headers.get("X-Profile-Id"):
+    failures.append("query flag did not trigger a profile")
+
+response = client.get("/analytics/summary", headers={"X-Profile": "test-admin-token"})
+if response.status_code != 200 or "X-Profile-Id" in response.headers:
+    failures.append("rate limit did not stop the third profile")
+
+response = client.get("/admin/profiles", headers={"X-Profile": "test-admin-token"})
+print(f"Saved profiles: {response.json()['profiles']}")
+
+response = client.get(f"/admin/profiles/{profile_id}", headers={"X-Profile": "test-admin-token"})
+with tempfile.NamedTemporaryFile(suffix=".prof", delete=False) as f:
+    f.write(response.content)
+stats_output = io.StringIO()
+pstats.Stats(f.name, stream=stats_output).print_stats()
+os.remove(f.name)
+if "get_summary" not in stats_output.getvalue():
+    failures.append("downloaded profile does not cover get_summary")
+
+if client.get("/admin/profiles").status_code != 403:
+    failures.append("profile list is available without the admin token")
+
+# Non-ASCII tokens are rejected like any other wrong token, not with a 500
+unchecked_client = TestClient(main.app, raise_server_exceptions=False)
+if unchecked_client.get("/analytics/summary", params={"profile": "é"}).status_code != 403:
+    failures.append("non-ASCII profile flag was not rejected with 403")
+if unchecked_client.get("/admin/profiles", headers={"X-Profile": "é".encode("utf-8")}).status_code != 403:
+    failures.append("non-ASCII admin header was not rejected with 403")
+
+# cProfile hooks the whole event-loop thread, so profiles must not overlap
+service = ProfilingService("test-admin-token", profile_dir, max_per_minute=10)
+if not service.acquire():
+    failures.append("idle profiler refused a profile")
+with service.profile("first"):
+    if service.acquire():
+        failures.append("a second profile could start while one was in flight")
+if not service.acquire():
+    failures.append("profiling slot was not released after the profile")
+with service.profile("second"):
+    pass
+
+if failures:
+    for failure in failures:
+        print(f"❌ FAILED: {failure}")
+else:
+    print("✅ Profiling is opt-in, rate limited and downloadable")
+
+shutil.rmtree(profile_dir)
+for name in ("PROFILING_TOKEN", "PROFILING_DIR", "PROFILING_MAX_PER_MINUTE"):
+    os.environ.pop(name)
@@ -0,0 +1,141 @@
+import random
+import time
+from datetime import date, datetime
+
+from database.database import Database
+from database.search_index import SearchIndex, tokenize
+from models.models import Statement, Transaction
+
+# Indexed description search vs. a linear scan over every transaction
+
+NUM_STATEMENTS = 100
+TRANSACTIONS_PER_STATEMENT = 1000
+
+merchants = [
+    "CARGILLS FOOD CITY", "KEELLS SUPER", "ARPICO SUPER CENTER", "UMANDAWA GREEN HUT",
+    "ASIRI LAB", "SETH LANKA PHARMACY", "SPICE TRAIL RESTAURA", "NIPPON VILLA",
+    "LANKA IOC", "SOFTLOGIC GLOMARK", "MINERAL SPRING PVT LTD", "ODEL STORE"
+]
+towns = ["COLOMBO 03", "COLOMBO 07", "KADAWATHA", "KELANIYA", "HIKKADUWA", "MAHARAGAMA", "WALIPENNA"]
+
+random.seed(0)
+db = Database()
+for index in range(NUM_STATEMENTS):
+    month = index % 12 + 1
+    year = 2024 + index // 50
+    db.add_statement(Statement(
+        filename=f"Statement {index}.pdf",
+        month=month,
+        year=year,
+        transactions=[
+            Transaction(
+                post_date=datetime(year, month, n % 28 + 1),
+                inv_date=datetime(year, month, n % 28 + 1),
+                description=f"{random.choice(merchants)} {n % 500}, {random.choice(towns)}",
+                amount=round(random.uniform(100, 20000), 2),
+                # Some statements are all one category, so category filters can skip statements
+                category="Grocery" if index % 3 == 0 else random.choice(["Grocery", "Fuel", "Other"])
+            )
+            for n in range(TRANSACTIONS_PER_STATEMENT)
+        ]
+    ))
+
+def linear_scan(terms, start_date=None, end_date=None, min_amount=None, max_amount=None, category=None):
+    matches = {}
+    for transaction in db.snapshot().transactions.values():
+        tokens = tokenize(transaction.description)
+        if not all(
+            any(token.startswith(term[:-1]) for token in tokens) if term.endswith("*") else term in tokens
+            for term in terms
+        ):
+            continue
+        post_date = transaction.post_date.date()
+        if start_date and post_date < start_date or end_date and post_date > end_date:
+            continue
+        if min_amount is not None and transaction.amount < min_amount:
+            continue
+        if max_amount is not None and transaction.amount > max_amount:
+            continue
+        if category and transaction.category != category:
+            continue
+        matches[transaction.id] = transaction
+    return matches
+
+queries = [
+    ("cargills", {"start_date": date(2025, 1, 1), "end_date": date(2025, 12, 31)}),
+    ("carg* colombo", {}),
+    ("umandawa 42", {}),
+    ("nothing", {})
+]
+
+print(f"Testing indexed search over {NUM_STATEMENTS * TRANSACTIONS_PER_STATEMENT} transactions")
+print("=" * 80)
+print(f"{'Query':<20} {'Matches':>8} {'Index':>10} {'Scan':>10}")
+
+failures = []
+
+for query, filters in queries:
+    start = time.perf_counter()
+    total, results = db.search_transactions(query, limit=1000000, **filters)
+    index_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = linear_scan(query.split(), **filters)
+    scan_time = time.perf_counter() - start
+
+    print(f"{query:<20} {total:>8} {index_time * 1000:>8.1f}ms {scan_time * 1000:>8.1f}ms")
+    if {transaction.id for _, transaction in results} != expected.keys():
+        failures.append(f"indexed results differ from scan for '{query}'")
+
+# Default result limit: the newest matches and the full count, with filters
+# that skip whole statements, cover them entirely or split them
+limited_queries = [
+    ("colombo", {}),
+    ("c*", {}),
+    ("colombo", {"category": "Grocery"}),
+    ("colombo", {"category": "Fuel"}),
+    ("cargills", {"start_date": date(2025, 1, 10), "end_date": date(2025, 3, 31)}),
+    ("carg* colombo", {"min_amount": 19000}),
+    ("keells", {"max_amount": 500, "category": "Other"})
+]
+
+print()
+print(f"{'Query (newest 100)':<20} {'Filters':<40} {'Matches':>8} {'Index':>10}")
+for query, filters in limited_queries:
+    start = time.perf_counter()
+    total, results = db.search_transactions(query, **filters)
+    index_time = time.perf_counter() - start
+
+    expected = linear_scan(query.split(), **filters)
+    filter_text = ", ".join(f"{name}={value}" for name, value in filters.items())
+    print(f"{query:<20} {filter_text:<40} {total:>8} {index_time * 1000:>8.1f}ms")
+
+    newest_dates = sorted((t.post_date for t in expected.values()), reverse=True)[:100]
+    if total != len(expected):
+        failures.append(f"'{query}' with {filters} counted {total} matches, scan found {len(expected)}")
+    if any(transaction.id not in expected for _, transaction in results):
+        failures.append(f"'{query}' with {filters} returned transactions outside the filters")
+    if [transaction.post_date for _, transaction in results] != newest_dates:
+        failures.append(f"'{query}' with {filters} did not return the newest matches in order")
+
+# A '*' with no token of its own must not turn the previous term into a prefix
+index = SearchIndex().with_statements([Statement(
+    filename="Prefix.pdf",
+    month=1,
+    year=2025,
+    transactions=[
+        Transaction(post_date=datetime(2025, 1, 1), inv_date=datetime(2025, 1, 1),
+                    description=description, amount=100.0)
+        for description in ("CARGILLS FOOD CITY", "CARGILLSX ONLINE")
+    ]
+)])
+for query, expected_count in (("cargills *", 1), ("cargills - *", 1), ("cargills*", 2)):
+    count = len(list(index.search(query)))
+    if count != expected_count:
+        failures.append(f"'{query}' matched {count} transactions, expected {expected_count}")
+
+if failures:
+    for failure in failures:
+        print(f"❌ FAILED: {failure}")
+else:
+    print("✅ Search index test complete")
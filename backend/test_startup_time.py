@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+# Import-time profile of the API module (python -X importtime)
+
+backend_dir = os.path.dirname(os.path.abspath(__file__))
+heavy_modules = ["sklearn", "numpy", "pdfplumber", "pypdf"]
+
+result = subprocess.run(
+    [
+        sys.executable, "-X", "importtime", "-c",
+        f"import sys, main; print([m for m in {heavy_modules!r} if m in sys.modules])"
+    ],
+    cwd=backend_dir,
+    capture_output=True,
+    text=True
+)
+
+# Each line: "import time: <self us> | <cumulative us> | <indented module>"
+imports = []
+for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "self [us]" in line:
+        continue
+    self_us, cumulative_us, module = line[len("import time:"):].split("|")
+    imports.append((module.strip(), int(self_us), int(cumulative_us)))
+
+print("Import-time profile for 'import main'")
+print("=" * 80)
+main_entry = next((entry for entry in imports if entry[0] == "main"), None)
+if main_entry:
+    print(f"Total: {main_entry[2] / 1000:.1f} ms")
+
+print(f"{'Module':<50} {'Self (ms)':>10} {'Cumulative (ms)':>16}")
+for module, self_us, cumulative_us in sorted(imports, key=lambda entry: -entry[2])[:15]:
+    print(f"{module:<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>16.1f}")
+
+loaded_heavy = result.stdout.strip()
+print(f"Heavy modules loaded at import: {loaded_heavy}")
+if loaded_heavy != "[]":
+    print("❌ FAILED: heavy dependencies are imported eagerly")
+else:
+    print("✅ PDF and ML libraries are loaded lazily")